@@ -0,0 +1,142 @@
+from ftw.testbrowser.core import Browser
+from ftw.testbrowser.drivers import LIB_ASYNC
+from ftw.testbrowser.exceptions import NoElementFound
+from ftw.testbrowser.log import ExceptionLogger
+from ftw.testbrowser.queryinfo import QueryInfo
+from ftw.testbrowser.response import PageResponse
+
+import asyncio
+import inspect
+
+
+async def resolved(result):
+    """Returns the result of a driver method, awaiting it when the driver
+    is asynchronous.
+    """
+    if inspect.isawaitable(result):
+        return await result
+    return result
+
+
+class AsyncBrowser(Browser):
+    """The async browser makes actual requests with an asyncio transport,
+    so that many browsers can run concurrently in one event loop.
+    The methods doing requests are coroutines and must be awaited:
+
+    .. code:: py
+
+        async def test_news(self):
+            with AsyncBrowser() as browser:
+                await browser.open('http://localhost:8080/plone')
+                await browser.click_on('News')
+                await browser.find('Search').submit()
+
+    Since ``form.submit()`` and ``link.click()`` return the result of
+    ``browser.open``, they are awaited too.
+    Finding and reading nodes, forms and tables works as in the
+    :py:class:`ftw.testbrowser.core.Browser`.
+
+    Exceptions of the Zope server are not logged, since the log handler
+    is shared by all browsers of the event loop.
+    WebDAV and widgets doing requests are not supported.
+
+    Synchronous drivers, such as the replay driver used by
+    :py:func:`ftw.testbrowser.core.Browser.replay`, can be used too; their
+    requests block the event loop while they are made.
+    """
+
+    def __init__(self):
+        super(AsyncBrowser, self).__init__()
+        self.default_driver = LIB_ASYNC
+
+    async def open(self, url_or_object=None, data=None, view=None,
+                   library=None, referer=False, method=None, headers=None,
+                   send_authenticator=False, stream=False):
+        """Opens a page in the browser.
+
+        .. seealso:: :py:func:`ftw.testbrowser.core.Browser.open`
+        """
+        driver, request = self._prepare_request(
+            url_or_object=url_or_object, data=data, view=view,
+            library=library, referer=referer, method=method, headers=headers,
+            send_authenticator=send_authenticator, stream=stream)
+        fingerprint = self._fingerprint_request(request)
+        with self._disabled_resource_registries():
+            response = await resolved(driver.make_request(**request))
+        self._record_response(fingerprint, request, response, driver)
+        return self._handle_response(response, ExceptionLogger(), driver)
+
+    async def visit(self, *args, **kwargs):
+        """Visit is an alias for :py:func:`open`.
+        """
+        return await self.open(*args, **kwargs)
+
+    async def on(self, url_or_object=None, data=None, view=None,
+                 library=None):
+        """Opens the page unless it is the current page.
+
+        .. seealso:: :py:func:`ftw.testbrowser.core.Browser.on`
+        """
+        url = self._normalize_url(url_or_object, view=view)
+        if url == self.url:
+            return self
+
+        return await self.open(url_or_object=url_or_object, data=data,
+                               view=view, library=library)
+
+    async def reload(self):
+        """Reloads the current page by redoing the previous requests with
+        the same arguments.
+
+        .. seealso:: :py:func:`ftw.testbrowser.core.Browser.reload`
+        """
+        self._verify_setup()
+        driver = self.get_driver()
+        with self._disabled_resource_registries():
+            response = await resolved(driver.reload())
+        return self._handle_response(response, ExceptionLogger(), driver)
+
+    async def open_many(self, urls_or_objects, concurrency=4, view=None,
+                        library=None, headers=None):
+        """Fetches multiple pages concurrently in the event loop.
+
+        .. seealso:: :py:func:`ftw.testbrowser.core.Browser.open_many`
+        """
+        self._verify_setup()
+        urls = [self._normalize_url(url_or_object, view=view)
+                for url_or_object in urls_or_objects]
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def fetch(url):
+            async with semaphore:
+                try:
+                    with self.clone() as subbrowser:
+                        driver = subbrowser.get_driver(library)
+                        response = await resolved(driver.make_request(
+                            'GET', url, referer_url=' ',
+                            headers=dict(headers or {})))
+                        return PageResponse.from_driver(url, driver, response)
+                except Exception as exc:
+                    return PageResponse(url, error=exc)
+
+        with self._disabled_resource_registries():
+            return list(await asyncio.gather(*map(fetch, urls)))
+
+    @QueryInfo.build
+    async def click_on(self, text, within=None, query_info=None):
+        """Find a link by its text and click on it.
+
+        .. seealso:: :py:func:`ftw.testbrowser.core.Browser.click_on`
+        """
+        node = self.find(text)
+        if not node:
+            raise NoElementFound(query_info)
+
+        await node.click()
+        return self
+
+    def close(self):
+        """Closes the idle connections of the transport.
+        """
+        if LIB_ASYNC in self.drivers:
+            self.drivers[LIB_ASYNC].transport.close()
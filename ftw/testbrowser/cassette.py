@@ -0,0 +1,181 @@
+from base64 import b64decode
+from base64 import b64encode
+from collections import defaultdict
+from ftw.testbrowser.exceptions import RequestNotRecorded
+from six.moves.urllib.parse import urlencode
+
+import gzip
+import hashlib
+import json
+import re
+import six
+
+
+#: Version of the cassette file format.
+CASSETTE_VERSION = 1
+
+#: Placeholder replacing the random boundary of multipart request bodies,
+#: so that the fingerprint of a form submission does not change.
+BOUNDARY_PLACEHOLDER = b'ftw.testbrowser-boundary'
+
+
+class Cassette(object):
+    """A cassette stores the request / response pairs of a browser session,
+    so that the responses can be served by the
+    :py:class:`ftw.testbrowser.drivers.replaydriver.ReplayDriver` without
+    doing the requests again.
+
+    Responses are looked up by the fingerprint of the request, which
+    consists of the method, the URL and a hash of the request body.
+    When the same request was recorded multiple times, the responses are
+    replayed in the recorded order and the last one is repeated.
+
+    The cassette is stored as gzip compressed JSON file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.interactions = []
+        self._by_fingerprint = defaultdict(list)
+        self.rewind()
+
+    @classmethod
+    def load(klass, path):
+        """Loads a cassette from the filesystem.
+
+        :param path: The path of the cassette file.
+        :type path: string
+        :returns: The cassette.
+        :rtype: :py:class:`ftw.testbrowser.cassette.Cassette`
+        """
+        cassette = klass(path)
+        with gzip.open(path, 'rb') as file_:
+            data = json.loads(file_.read().decode('utf-8'))
+
+        if data.get('version') != CASSETTE_VERSION:
+            raise ValueError('Unsupported cassette version {!r} in {}.'.format(
+                data.get('version'), path))
+
+        for interaction in data['interactions']:
+            interaction['body'] = b64decode(interaction['body'])
+            cassette._add(interaction)
+        return cassette
+
+    def save(self):
+        """Writes the cassette to its path.
+        """
+        data = {'version': CASSETTE_VERSION,
+                'interactions': [
+                    dict(interaction,
+                         body=b64encode(interaction['body']).decode('ascii'))
+                    for interaction in self.interactions]}
+
+        with gzip.open(self.path, 'wb') as file_:
+            file_.write(json.dumps(data, sort_keys=True, default=str)
+                        .encode('utf-8'))
+
+    def rewind(self):
+        """Starts replaying every request with its first recorded response.
+        """
+        self._played = defaultdict(int)
+
+    def record(self, fingerprint, request, response, driver):
+        """Records the response of a request made by a driver.
+
+        :param fingerprint: The fingerprint of the request, which is
+          calculated before making the request, since the driver may consume
+          the request body.
+        :param request: The keyword arguments of ``make_request``.
+        :type request: dict
+        :param response: The status code, reason and body returned by
+          ``make_request``.
+        :param driver: The driver which made the request.
+        """
+        status_code, status_reason, _ = response
+        self._add({
+            'fingerprint': fingerprint,
+            'method': request['method'],
+            'url': request['url'],
+            'status_code': status_code,
+            'status_reason': status_reason,
+            'final_url': driver.get_url(),
+            'headers': list(driver.get_response_headers().items()),
+            'cookies': driver.get_response_cookies(),
+            'body': self._read_body(driver.get_response_body())})
+
+    def play(self, method, url, data=None, headers=None):
+        """Returns the next recorded response of a request.
+
+        :returns: The recorded interaction with the keys ``status_code``,
+          ``status_reason``, ``final_url``, ``headers``, ``cookies`` and
+          ``body``.
+        :rtype: dict
+        :raises: :py:exc:`ftw.testbrowser.exceptions.RequestNotRecorded`
+        """
+        fingerprint = self.fingerprint(method, url, data=data,
+                                       headers=headers)
+        recorded = self._by_fingerprint.get(fingerprint)
+        if not recorded:
+            raise RequestNotRecorded(method, url)
+
+        position = min(self._played[fingerprint], len(recorded) - 1)
+        self._played[fingerprint] += 1
+        return recorded[position]
+
+    @classmethod
+    def fingerprint(klass, method, url, data=None, headers=None,
+                    referer_url=None, stream=False):
+        """Returns the fingerprint of a request, made of the method, the URL
+        and a hash of the request body.
+        The arguments are the same as of ``make_request``.
+
+        :returns: The fingerprint.
+        :rtype: string
+        """
+        body = klass._encode_body(data)
+        content_type = dict((name.lower(), value)
+                            for name, value in (headers or {}).items()).get(
+                                'content-type', '')
+        match = re.search(r'boundary="?([^";]+)"?', content_type)
+        if match:
+            body = body.replace(match.group(1).encode('ascii'),
+                                BOUNDARY_PLACEHOLDER)
+
+        return hashlib.sha1(b'\n'.join((
+            method.upper().encode('utf-8'),
+            six.ensure_binary(url),
+            hashlib.sha256(body).hexdigest().encode('ascii')))).hexdigest()
+
+    def _add(self, interaction):
+        self.interactions.append(interaction)
+        self._by_fingerprint[interaction['fingerprint']].append(interaction)
+
+    @staticmethod
+    def _encode_body(data):
+        if data is None:
+            return b''
+
+        if hasattr(data, 'read'):
+            position = data.tell()
+            body = data.read()
+            data.seek(position)
+            return six.ensure_binary(body)
+
+        if isinstance(data, (six.text_type, six.binary_type)):
+            return six.ensure_binary(data)
+
+        if hasattr(data, 'items'):
+            data = data.items()
+        return six.ensure_binary(urlencode(
+            sorted(data, key=lambda item: item[0]), doseq=True))
+
+    @staticmethod
+    def _read_body(body):
+        if hasattr(body, 'read'):
+            body.seek(0)
+            content = body.read()
+            body.seek(0)
+            return content
+        if isinstance(body, memoryview):
+            return body.tobytes()
+        return body
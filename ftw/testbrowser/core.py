@@ -3,8 +3,10 @@ from Acquisition import aq_chain
 from cgi import parse_header
 from contextlib import contextmanager
 from copy import deepcopy
+from ftw.testbrowser.cassette import Cassette
 from ftw.testbrowser.drivers import DRIVER_FACTORIES
 from ftw.testbrowser.drivers import LIB_MECHANIZE
+from ftw.testbrowser.drivers import LIB_REPLAY
 from ftw.testbrowser.drivers import LIB_REQUESTS
 from ftw.testbrowser.drivers import LIB_STATIC
 from ftw.testbrowser.drivers import LIB_TRAVERSAL  # noqa
@@ -20,17 +22,24 @@ from ftw.testbrowser.exceptions import HTTPServerError
 from ftw.testbrowser.exceptions import InsufficientPrivileges
 from ftw.testbrowser.exceptions import NoElementFound
 from ftw.testbrowser.exceptions import NoWebDAVSupport
+from ftw.testbrowser.index import ElementIndex
 from ftw.testbrowser.interfaces import IBrowser
 from ftw.testbrowser.log import ExceptionLogger
 from ftw.testbrowser.nodes import wrap_nodes
 from ftw.testbrowser.nodes import wrapped_nodes
 from ftw.testbrowser.parser import TestbrowserHTMLParser
 from ftw.testbrowser.queryinfo import QueryInfo
+from ftw.testbrowser.response import PageResponse
+from ftw.testbrowser.selectors import compile_xpath
+from ftw.testbrowser.selectors import css_to_xpath
 from ftw.testbrowser.utils import basic_auth_encode
+from ftw.testbrowser.utils import BufferReader
+from ftw.testbrowser.utils import iter_chunks
 from ftw.testbrowser.utils import normalize_spaces
+from ftw.testbrowser.utils import SpooledBody
+from functools import partial
 from functools import reduce
 from io import open
-from lxml.cssselect import CSSSelector
 from OFS.interfaces import IItem
 from operator import attrgetter
 from operator import methodcaller
@@ -45,12 +54,16 @@ from zope.interface import implementer
 import json
 import lxml
 import lxml.html
+import mmap
 import os
 import pkg_resources
 import re
 import six
+import six.moves.queue
 import six.moves.urllib.parse
 import tempfile
+import threading
+import weakref
 
 
 try:
@@ -64,6 +77,9 @@ else:
 
 PLONE5 = getFSVersionTuple() >= (5, 0)
 
+#: The default chunk size of ``iter_body`` and ``save_body`` in bytes.
+BODY_CHUNK_SIZE = 64 * 1024
+
 if PLONE5:
     from ftw.testbrowser.plone5 import disabled_resource_registries
 
@@ -100,11 +116,44 @@ class Browser(object):
       view are bubbled up into the test method if the driver supports it.
       (Default: ``False``).
     :type exception_bubbling: ``bool``
+
+    :ivar lazy_parsing: When enabled, the response body is not parsed when
+      the request is made but only when the document is accessed for the
+      first time, e.g. by ``css``, ``xpath`` or ``forms``.
+      Responses which are only inspected with ``json``, ``body`` or
+      ``headers`` are therefore never parsed.
+      The option is not reset between sessions so that it can be
+      configured once, e.g. in a testing layer (Default: ``False``).
+    :type lazy_parsing: ``bool``
+
+    :ivar indexed_queries: When enabled, simple CSS selectors (such as
+      ``#content``, ``.portalMessage``, ``form`` or ``input[name="title"]``)
+      are answered by an index of the document, which is built once per
+      document, instead of walking the document with xpath.
+      Tests manipulating the lxml document directly must call
+      ``invalidate_document_caches`` afterwards.
+      The option is not reset between sessions (Default: ``False``).
+    :type indexed_queries: ``bool``
+
+    :ivar spill_threshold: When set, response bodies are streamed from the
+      driver into a spooled temporary file and bodies bigger than
+      ``spill_threshold`` bytes are spilled to disk.
+      The ``body`` of a spilled response is a read-only memory mapping of
+      the file, which is closed with the next request.
+      ``contents``, ``json`` and the parsers read from the mapping.
+      The option is not reset between sessions (Default: ``None``).
+    :type spill_threshold: ``int``
     """
 
     def __init__(self):
         self.drivers = {}
         self.default_driver = None
+        self.lazy_parsing = False
+        self.indexed_queries = False
+        self.spill_threshold = None
+        self._spooled_body = None
+        self._upload_body = None
+        self._cassette = None
         self._log_exceptions = True
         self._context_manager_active = False
         self.reset()
@@ -134,6 +183,9 @@ class Browser(object):
         self.allow_redirects = True
         self._status_code = None
         self._status_reason = None
+        self._spill = False
+        self._set_spooled_body(None)
+        self._set_upload_body(None)
 
         if not self._context_manager_active:
             self.request_library = None
@@ -198,7 +250,7 @@ class Browser(object):
 
     def open(self, url_or_object=None, data=None, view=None, library=None,
              referer=False, method=None, headers=None,
-             send_authenticator=False):
+             send_authenticator=False, stream=False):
         """Opens a page in the browser.
 
         *Request library:*
@@ -236,12 +288,36 @@ class Browser(object):
           The code using the testbrowser with the ``send_authenticator`` option
           must make sure that ``plone.protect`` is installed.
         :type send_authenticator: Boolean (Default ``False``)
+        :param stream: When enabled, the response body is not loaded nor
+          parsed, so that large downloads can be read in chunks with
+          :py:func:`iter_body` or written to a file with :py:func:`save_body`.
+        :type stream: Boolean (Default ``False``)
 
         .. seealso:: :py:func:`visit`
         .. seealso:: :py:const:`LIB_MECHANIZE`
         .. seealso:: :py:const:`LIB_REQUESTS`
         """
+        driver, request = self._prepare_request(
+            url_or_object=url_or_object, data=data, view=view,
+            library=library, referer=referer, method=method, headers=headers,
+            send_authenticator=send_authenticator, stream=stream)
+        fingerprint = self._fingerprint_request(request)
+        with ExceptionLogger() as logger:
+            with self._disabled_resource_registries():
+                response = driver.make_request(**request)
+
+        self._record_response(fingerprint, request, response, driver)
+        return self._handle_response(response, logger, driver)
+
+    def _prepare_request(self, url_or_object=None, data=None, view=None,
+                         library=None, referer=False, method=None,
+                         headers=None, send_authenticator=False,
+                         stream=False):
+        """Prepares the request of ``open`` and returns the driver and the
+        keyword arguments for its ``make_request``.
+        """
         self._verify_setup()
+        self._set_upload_body(None)
         self.previous_url = self.url
         library = library or self.request_library
 
@@ -267,15 +343,43 @@ class Browser(object):
 
         url = self._normalize_url(url_or_object, view=view)
         driver = self.get_driver(library)
-        with ExceptionLogger() as logger:
-            with self._disabled_resource_registries():
-                self._status_code, self._status_reason, body = driver.make_request(
-                    method, url, data=data,
-                    referer_url=referer_url,
-                    headers=headers)
+        # Bodies are spilled by streaming them from the driver.
+        self._spill = not stream and self.spill_threshold is not None
+        return driver, dict(method=method, url=url, data=data,
+                            referer_url=referer_url, headers=headers,
+                            stream=stream or self._spill)
+
+    def _fingerprint_request(self, request):
+        """Returns the fingerprint of a request while recording.
+        """
+        if self._cassette is not None:
+            return self._cassette.fingerprint(**request)
+
+    def _record_response(self, fingerprint, request, response, driver):
+        """Records the response of a request while recording.
+        """
+        if self._cassette is not None:
+            self._cassette.record(fingerprint, request, response, driver)
 
-        self.parse(body)
-        self.raise_for_status(logger)
+    def _handle_response(self, response, exception_logger, driver):
+        """Stores and parses the response of a driver and raises HTTP errors.
+        Streamed responses have no body and are not parsed, unless they are
+        streamed for spilling the body.
+        """
+        self._status_code, self._status_reason, body = response
+        self._set_spooled_body(None)
+        if body is None and self._spill:
+            self._set_spooled_body(SpooledBody(
+                driver.iter_response_body(BODY_CHUNK_SIZE),
+                self.spill_threshold))
+            body = self._spooled_body.body
+
+        if body is None:
+            self.form_files = {}
+            self.document = None
+        else:
+            self._parse_response(body)
+        self.raise_for_status(exception_logger)
         return self
 
     def raise_for_status(self, exception_logger):
@@ -315,6 +419,89 @@ class Browser(object):
         return self.open(url_or_object=url_or_object, data=data, view=view,
                          library=library)
 
+    def open_many(self, urls_or_objects, concurrency=4, view=None,
+                  library=None, headers=None):
+        """Fetches multiple pages with ``GET`` requests and returns a
+        lightweight response per page, in the order of the URLs.
+        The pages are fetched by clones of this browser, sharing its
+        cookies and headers, but not changing the state of this browser.
+
+        Drivers supporting concurrent requests (requests and webtest) fetch
+        the pages with ``concurrency`` threads, the other drivers fetch them
+        one after another.
+
+        Errors are not raised but stored on the response of the URL, so
+        that a failing URL does not abort the batch. HTTP error status
+        codes are not considered errors.
+
+        :param urls_or_objects: Full qualified URLs or Plone objects.
+        :type urls_or_objects: list
+        :param concurrency: The number of pages fetched at the same time.
+        :type concurrency: int (Default: ``4``)
+        :param view: The name of a view which will be added at the end of
+          each URL.
+        :type view: string
+        :param library: Lets you explicitly choose the request library.
+        :type library: ``LIB_REQUESTS`` or ``LIB_WEBTEST``
+        :param headers: A dict with custom headers for the requests.
+        :type headers: dict
+        :returns: A list of responses.
+        :rtype: list of :py:class:`ftw.testbrowser.response.PageResponse`
+        """
+        self._verify_setup()
+        urls = [self._normalize_url(url_or_object, view=view)
+                for url_or_object in urls_or_objects]
+        if not self.get_driver(library).CONCURRENT_REQUESTS:
+            concurrency = 1
+
+        responses = [None] * len(urls)
+        pending = six.moves.queue.Queue()
+        for position, url in enumerate(urls):
+            pending.put((position, url))
+
+        def iter_pending():
+            while True:
+                try:
+                    yield pending.get_nowait()
+                except six.moves.queue.Empty:
+                    return
+
+        def fetch_pending(subbrowser):
+            try:
+                with subbrowser:
+                    subdriver = subbrowser.get_driver()
+                    for position, url in iter_pending():
+                        responses[position] = self._fetch_page(
+                            subdriver, url, headers)
+            except Exception as exc:
+                # The sub browser is broken, the pages left fail with its
+                # error instead of being lost with the thread.
+                for position, url in iter_pending():
+                    responses[position] = PageResponse(url, error=exc)
+
+        subbrowsers = [self.clone()
+                       for _ in range(max(1, min(concurrency, len(urls))))]
+        with self._disabled_resource_registries():
+            if len(subbrowsers) == 1:
+                fetch_pending(subbrowsers[0])
+            else:
+                threads = [threading.Thread(target=fetch_pending,
+                                            args=(subbrowser,))
+                           for subbrowser in subbrowsers]
+                list(map(methodcaller('start'), threads))
+                list(map(methodcaller('join'), threads))
+
+        return responses
+
+    @staticmethod
+    def _fetch_page(driver, url, headers):
+        try:
+            response = driver.make_request(
+                'GET', url, referer_url=' ', headers=dict(headers or {}))
+            return PageResponse.from_driver(url, driver, response)
+        except Exception as exc:
+            return PageResponse(url, error=exc)
+
     def open_html(self, html):
         """Opens a HTML page in the browser without doing a request.
         The passed ``html`` may be a string or a file-like stream.
@@ -324,6 +511,7 @@ class Browser(object):
         :returns: The browser object.
         """
         self.get_driver(LIB_STATIC).set_body(html)
+        self._set_spooled_body(None)
         self.parse(html)
         self._status_code = 200
         self._status_reason = 'OK'
@@ -363,7 +551,8 @@ class Browser(object):
 
         self._status_code, self._status_reason, body = driver.make_request(
             method, url, data=data, headers=headers)
-        self.parse(body)
+        self._set_spooled_body(None)
+        self._parse_response(body)
         return self
 
     def reload(self):
@@ -379,16 +568,127 @@ class Browser(object):
         driver = self.get_driver()
 
         with ExceptionLogger() as logger:
-            self._status_code, self._status_reason, body = driver.reload()
+            response = driver.reload()
+
+        return self._handle_response(response, logger, driver)
+
+    @contextmanager
+    def recording(self, path):
+        """Context manager for recording the requests made with ``open``
+        (which includes submitting forms and clicking links) into a
+        cassette, which is written to ``path`` when the block is left.
+        Any driver can be used for recording.
 
-        self.parse(body)
-        self.raise_for_status(logger)
+        .. code:: py
+
+            with browser.recording('/tmp/news.cassette'):
+                browser.login().open(view='news')
+                browser.click_on('First news')
+
+        :param path: The path of the cassette file.
+        :type path: string
+        :returns: The cassette.
+        :rtype: :py:class:`ftw.testbrowser.cassette.Cassette`
+
+        .. seealso:: :py:func:`replay`
+        """
+        self._cassette = Cassette(path)
+        try:
+            yield self._cassette
+        finally:
+            self._cassette.save()
+            self._cassette = None
+
+    def replay(self, path):
+        """Loads a cassette recorded with :py:func:`recording` and uses
+        the replay driver for the session, which serves the recorded
+        responses instead of doing requests.
+        Since no Zope app is involved, the pages must be opened with full
+        qualified URLs.
+        Reloading serves the current response again.
+        The replay driver can be used by the
+        :py:class:`ftw.testbrowser.asyncbrowser.AsyncBrowser` too.
+
+        .. code:: py
+
+            with Browser().replay('/tmp/news.cassette') as browser:
+                browser.open('http://nohost/plone/news')
+                browser.click_on('First news')
+
+        :param path: The path of the cassette file.
+        :type path: string
+        :raises: :py:exc:`ftw.testbrowser.exceptions.RequestNotRecorded`
+          when opening a page which is not recorded.
+        :returns: The browser object.
+        :rtype: :py:class:`ftw.testbrowser.core.Browser`
+        """
+        self.request_library = LIB_REPLAY
+        self.get_driver(LIB_REPLAY).cassette = Cassette.load(path)
         return self
 
+    @property
+    def document(self):
+        """The parsed lxml document of the current page or ``None``.
+        When ``lazy_parsing`` is enabled, the response is parsed on the first
+        access.
+        """
+        if self._document_loader is not None:
+            loader, self._document_loader = self._document_loader, None
+            loader()
+        return self._document
+
+    @document.setter
+    def document(self, document):
+        self._document_loader = None
+        self._document = document
+        self.invalidate_document_caches()
+
+    @property
+    def element_index(self):
+        """The element index of the current document, which is built on
+        first access.
+        It is ``None`` when ``indexed_queries`` is disabled or there is
+        no document.
+
+        :rtype: :py:class:`ftw.testbrowser.index.ElementIndex`
+        """
+        if not self.indexed_queries:
+            return None
+
+        if self._element_index is None:
+            document = self.document
+            if document is None:
+                return None
+            self._element_index = ElementIndex(document.getroot())
+
+        return self._element_index
+
+    def invalidate_document_caches(self):
+        """Drops all data derived from the current document, such as the
+        element index, the forms with their inputs, field indexes and labels,
+        the table grids and the node wrappers, which are reused for the same
+        element as long as they are referenced.
+        This must be called when the lxml document is modified in place.
+        """
+        self._element_index = None
+        self._widget_matches = {}
+        self._wrappers = weakref.WeakValueDictionary()
+        self._forms = None
+        self._form_inputs = {}
+        self._field_indexes = {}
+        self._label_maps = {}
+        self._table_grids = {}
+
     @property
     def body(self):
-        """The binary response content"""
+        """The binary response content.
+        Spilled bodies are a read-only memory mapping.
+
+        .. seealso:: :py:attr:`spill_threshold`
+        """
         self._verify_setup()
+        if self._spooled_body is not None:
+            return self._spooled_body.body
         return self.get_driver().get_response_body()
 
     @property
@@ -398,6 +698,9 @@ class Browser(object):
         body = self.body
         content_type = self.get_driver().get_response_headers().get(
             'Content-Type', 'text/html')
+        if isinstance(body, mmap.mmap):
+            body = self._read_mapping(body, content_type)
+
         if content_type.startswith('text/'):
             main, params = parse_header(content_type)
             encoding = params.get('charset', 'utf8')
@@ -416,6 +719,41 @@ class Browser(object):
         """
         return json.loads(self.contents)
 
+    def iter_body(self, chunk_size=BODY_CHUNK_SIZE):
+        """Iterates over the response body in chunks.
+        Responses opened with ``stream=True`` are read from the driver while
+        iterating, without loading the whole body into memory, thus they can
+        only be iterated once.
+
+        :param chunk_size: The maximum size of a chunk in bytes.
+        :type chunk_size: int (Default: ``BODY_CHUNK_SIZE``)
+        :returns: An iterator of bytes chunks.
+
+        .. seealso:: :py:func:`open`
+        """
+        self._verify_setup()
+        if self._spooled_body is not None:
+            # The mapping is the body of the response and stays open.
+            return iter_chunks(self._spooled_body.body, chunk_size,
+                               close=False)
+        return self.get_driver().iter_response_body(chunk_size)
+
+    def save_body(self, path, chunk_size=BODY_CHUNK_SIZE):
+        """Writes the response body in chunks to a file.
+
+        :param path: The path of the file to write.
+        :type path: string
+        :param chunk_size: The maximum size of a chunk in bytes.
+        :type chunk_size: int (Default: ``BODY_CHUNK_SIZE``)
+        :returns: The path of the file.
+
+        .. seealso:: :py:func:`iter_body`
+        """
+        with open(path, 'wb') as file_:
+            for chunk in self.iter_body(chunk_size):
+                file_.write(chunk)
+        return path
+
     @property
     def status_code(self):
         """The status code of the last response or ``None`` when no request
@@ -590,12 +928,19 @@ class Browser(object):
         :returns: Object containg matches.
         :rtype: :py:class:`ftw.testbrowser.nodes.Nodes`
         """
-        return self.xpath(CSSSelector(css_selector).path,
+        index = self.element_index
+        if index is not None:
+            nodes = index.select(css_selector)
+            if nodes is not None:
+                return wrap_nodes(nodes, self, query_info=query_info)
+
+        return self.xpath(css_to_xpath(css_selector),
                           query_info=query_info)
 
     @QueryInfo.build
-    def xpath(self, xpath_selector, query_info):
+    def xpath(self, xpath_selector, query_info, **variables):
         """Select one or more HTML nodes by using an *xpath* selector.
+        Additional keyword arguments are passed as xpath variables.
 
         :param xpath_selector: The xpath selector.
         :type xpath_selector: string
@@ -604,7 +949,7 @@ class Browser(object):
         """
         nsmap = self.document.getroot().nsmap
         return wrap_nodes(
-            self.document.xpath(xpath_selector, namespaces=nsmap),
+            compile_xpath(xpath_selector, nsmap)(self.document, **variables),
             self,
             query_info=query_info)
 
@@ -619,15 +964,17 @@ class Browser(object):
     def forms(self):
         """A *dict* of form instance where the key is the `id` or the `name` of
         the form and the value is the form node.
+        The forms are looked up once per document.
         """
-        forms = {}
+        if self._forms is None:
+            forms = {}
+            for index, node in enumerate(self.css('form')):
+                key = node.attrib.get('id', node.attrib.get(
+                    'name', 'form-%s' % index))
+                forms[key] = node
+            self._forms = forms
 
-        for index, node in enumerate(self.css('form')):
-            key = node.attrib.get('id', node.attrib.get(
-                'name', 'form-%s' % index))
-            forms[key] = node
-
-        return forms
+        return dict(self._forms)
 
     def fill(self, values):
         """Fill multiple fields of a form on the current page.
@@ -775,20 +1122,24 @@ class Browser(object):
         :raises: :py:exc:`ftw.testbrowser.exceptions.AmbiguousFormFields`
         """
 
-        previous_form = None
+        forms = []
+        missing = []
 
         for label_or_name in labels_or_names:
             form = self.find_form_by_field(label_or_name)
 
             if form is None:
-                raise FormFieldNotFound(label_or_name, self.form_field_labels)
+                missing.append(label_or_name)
+            elif form not in forms:
+                forms.append(form)
 
-            if previous_form is not None and form != previous_form:
-                raise AmbiguousFormFields()
+        if missing:
+            raise FormFieldNotFound(missing, self.form_field_labels)
 
-            previous_form = form
+        if len(forms) > 1:
+            raise AmbiguousFormFields()
 
-        return previous_form
+        return forms and forms[0] or None
 
     @property
     def form_field_labels(self):
@@ -985,7 +1336,7 @@ class Browser(object):
         :returns: A new browser instance.
         :rtype: :py:class:`ftw.testbrowser.core.Browser`
         """
-        subbrowser = Browser()(self.app)
+        subbrowser = type(self)()(self.app)
         subbrowser.request_library = self.request_library
         subbrowser.session_headers = deepcopy(self.session_headers)
         subbrowser.app = self.app
@@ -1027,6 +1378,11 @@ class Browser(object):
             parts[2] = '/'.join((parts[2].rstrip('/'), view))
             url = six.moves.urllib.parse.urlunparse(parts)
 
+        if six.moves.urllib.parse.urlparse(url).scheme:
+            # Full qualified URLs do not depend on the base URL, thus there
+            # is no need to parse the current document for a <base>-tag.
+            return url
+
         if self.base_url:
             url = six.moves.urllib.parse.urljoin(self.base_url, url)
 
@@ -1047,26 +1403,72 @@ class Browser(object):
 
         return html
 
+    def _parse_response(self, body):
+        """Parse the response body of a request, or defer the parsing
+        until the document is accessed when ``lazy_parsing`` is enabled.
+        """
+        if not self.lazy_parsing:
+            return self.parse(body)
+
+        self.form_files = {}
+        self.document = None
+        self._document_loader = partial(self.parse, body)
+
+    def _set_spooled_body(self, spooled_body):
+        """Replaces the spooled body of the current response, closing the
+        previous one.
+        """
+        if self._spooled_body is not None:
+            self._spooled_body.close()
+        self._spooled_body = spooled_body
+
+    def _set_upload_body(self, upload_body):
+        """Replaces the spooled request body of the last form submission,
+        closing the previous one.
+        The body is kept open until the next request, so that the submission
+        can be reloaded.
+        """
+        if self._upload_body is not None:
+            self._upload_body.close()
+        self._upload_body = upload_body
+
+    @staticmethod
+    def _read_mapping(mapping, content_type):
+        """Decodes text from a spilled body directly from the memory mapping,
+        without copying the body into a bytes object first.
+        """
+        if six.PY2:
+            return mapping[:]
+
+        main, params = parse_header(content_type)
+        if main.startswith('text/') or main.endswith(('/json', '+json')):
+            return str(mapping, params.get('charset', 'utf8'))
+        return mapping[:]
+
     def _load_html(self, html, parser):
         self.form_files = {}
 
         if hasattr(html, 'seek'):
+            # Check the length of streams without reading them.
+            html.seek(0, os.SEEK_END)
+            length = html.tell()
             html.seek(0)
+        else:
+            length = len(html)
 
-        if isinstance(html, six.text_type):
-            html = StringIO(html)
-
-        if isinstance(html, six.binary_type):
-            html = BytesIO(html)
-
-        if len(html.read()) == 0:
+        if length == 0:
             self.document = None
             return None
-        else:
-            html.seek(0)
-            self.document = parser(html)
 
-            return html
+        if isinstance(html, memoryview):
+            html = BufferReader(html)
+        elif isinstance(html, six.text_type):
+            html = StringIO(html)
+        elif isinstance(html, six.binary_type):
+            html = BytesIO(html)
+
+        self.document = parser(html)
+        return html
 
     @contextmanager
     def _disabled_resource_registries(self):
@@ -1,7 +1,10 @@
 from ftw.testbrowser.compat import HAS_ZOPE4
+from ftw.testbrowser.drivers.replaydriver import ReplayDriver
 from ftw.testbrowser.drivers.requestsdriver import RequestsDriver
 from ftw.testbrowser.drivers.staticdriver import StaticDriver
 
+import six
+
 
 #: Constant for choosing the requests library (actual requests)
 LIB_REQUESTS = RequestsDriver.LIBRARY_NAME
@@ -9,7 +12,11 @@ LIB_REQUESTS = RequestsDriver.LIBRARY_NAME
 #: Constant for choosing the static driver.
 LIB_STATIC = StaticDriver.LIBRARY_NAME
 
+#: Constant for choosing the replay driver (recorded responses)
+LIB_REPLAY = ReplayDriver.LIBRARY_NAME
+
 DRIVER_FACTORIES = {
+    ReplayDriver.LIBRARY_NAME: ReplayDriver,
     RequestsDriver.LIBRARY_NAME: RequestsDriver,
     StaticDriver.LIBRARY_NAME: StaticDriver,
 }
@@ -39,3 +46,17 @@ else:
     DRIVER_FACTORIES.update({
         WebtestDriver.LIBRARY_NAME: WebtestDriver,
     })
+
+if not six.PY2:
+    from ftw.testbrowser.drivers.asyncdriver import AsyncDriver
+
+    #: Constant for choosing the asyncio driver (actual requests, used by
+    #: the ``AsyncBrowser``)
+    LIB_ASYNC = AsyncDriver.LIBRARY_NAME
+
+    DRIVER_FACTORIES.update({
+        AsyncDriver.LIBRARY_NAME: AsyncDriver,
+    })
+
+else:
+    LIB_ASYNC = None
@@ -0,0 +1,328 @@
+from collections import defaultdict
+from collections import namedtuple
+from ftw.testbrowser.drivers.utils import remembering_for_reload
+from ftw.testbrowser.exceptions import BlankPage
+from ftw.testbrowser.exceptions import RedirectLoopException
+from ftw.testbrowser.exceptions import ZServerRequired
+from ftw.testbrowser.interfaces import IDriver
+from ftw.testbrowser.utils import copy_docs_from_interface
+from ftw.testbrowser.utils import iter_chunks
+from http.client import parse_headers
+from io import BytesIO
+from urllib.parse import urlencode
+from urllib.parse import urljoin
+from urllib.parse import urlsplit
+from urllib.request import Request
+from zope.interface import implementer
+
+import asyncio
+import requests
+
+
+#: The response of the asyncio transport.
+AsyncResponse = namedtuple('AsyncResponse', [
+    'url', 'status_code', 'reason', 'headers', 'content'])
+
+REDIRECT_STATUS_CODES = (301, 302, 303, 307, 308)
+
+
+class AsyncTransport(object):
+    """A minimal HTTP/1.1 client on top of asyncio streams.
+    Connections are kept alive and reused per host, so that many sessions
+    sharing a transport do not need a connection each.
+    """
+
+    def __init__(self, pool_size=10):
+        self.pool_size = pool_size
+        self._idle = defaultdict(list)
+        self._loop = None
+
+    async def request(self, method, url, headers=None, body=None):
+        """Sends a request and reads the complete response.
+
+        :returns: The status code, the reason, the headers and the body.
+        :rtype: tuple
+        """
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        key = (parts.scheme, parts.hostname, port)
+        target = parts.path or '/'
+        if parts.query:
+            target += '?' + parts.query
+
+        lines = ['{0} {1} HTTP/1.1'.format(method, target),
+                 'Host: {0}'.format(parts.netloc)]
+        lines.extend('{0}: {1}'.format(name, value)
+                     for name, value in (headers or {}).items())
+        if body is not None or method in ('POST', 'PUT', 'PATCH'):
+            lines.append('Content-Length: {0}'.format(len(body or b'')))
+        head = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Connections cannot be used in another event loop.
+            self._idle.clear()
+            self._loop = loop
+
+        while True:
+            reused = bool(self._idle[key])
+            reader, writer = await self._connect(key)
+            try:
+                writer.write(head + (body or b''))
+                await writer.drain()
+                response = await self._read_response(method, reader)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                if reused:
+                    # The server closed the idle connection, retry with
+                    # a new one.
+                    continue
+                raise
+            break
+
+        status_code, reason, response_headers, content, keep_alive = response
+        if keep_alive and len(self._idle[key]) < self.pool_size:
+            self._idle[key].append((reader, writer))
+        else:
+            writer.close()
+        return status_code, reason, response_headers, content
+
+    def close(self):
+        """Closes all idle connections.
+        """
+        if self._loop is None or not self._loop.is_closed():
+            # The connections of a closed event loop cannot be closed
+            # anymore, they are dropped and closed by the garbage collector.
+            for connections in self._idle.values():
+                for _, writer in connections:
+                    writer.close()
+        self._idle.clear()
+
+    async def _connect(self, key):
+        idle = self._idle[key]
+        while idle:
+            reader, writer = idle.pop()
+            if not reader.at_eof() and not writer.is_closing():
+                return reader, writer
+            writer.close()
+
+        scheme, host, port = key
+        return await asyncio.open_connection(
+            host, port, ssl=True if scheme == 'https' else None)
+
+    async def _read_response(self, method, reader):
+        while True:
+            status_line = await reader.readline()
+            if not status_line:
+                raise ConnectionError('Connection closed by server.')
+            version, status, reason = (
+                status_line.decode('latin-1').rstrip('\r\n') + '  ').split(
+                    ' ', 2)
+            status_code = int(status)
+            header_lines = []
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                header_lines.append(line)
+            headers = parse_headers(
+                BytesIO(b''.join(header_lines) + b'\r\n'))
+            if status_code != 100:
+                break
+
+        keep_alive = (
+            headers.get('Connection', '').lower() != 'close'
+            and (version != 'HTTP/1.0'
+                 or headers.get('Connection', '').lower() == 'keep-alive'))
+
+        if method == 'HEAD' or status_code in (204, 304) \
+           or status_code < 200:
+            content = b''
+        elif 'chunked' in headers.get('Transfer-Encoding', '').lower():
+            content = await self._read_chunked(reader)
+        elif headers.get('Content-Length') is not None:
+            content = await reader.readexactly(
+                int(headers['Content-Length']))
+        else:
+            content = await reader.read()
+            keep_alive = False
+
+        return status_code, reason.strip(), headers, content, keep_alive
+
+    async def _read_chunked(self, reader):
+        chunks = []
+        while True:
+            size_line = await reader.readline()
+            size = int(size_line.split(b';', 1)[0].strip(), 16)
+            if size == 0:
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+
+        # Skip the trailer headers up to the empty line.
+        while (await reader.readline()).strip():
+            pass
+        return b''.join(chunks)
+
+
+class CookieResponse(object):
+    """Adapts response headers to the interface expected by the cookie jar.
+    """
+
+    def __init__(self, headers):
+        self.headers = headers
+
+    def info(self):
+        return self.headers
+
+
+@copy_docs_from_interface
+@implementer(IDriver)
+class AsyncDriver(object):
+    """The asyncio driver makes real requests with an asyncio HTTP
+    transport. ``make_request`` and ``reload`` are coroutines, thus the
+    driver is used by the
+    :py:class:`ftw.testbrowser.asyncbrowser.AsyncBrowser`.
+    """
+    LIBRARY_NAME = 'asyncio library'
+    WEBDAV_SUPPORT = False
+    STREAMING_UPLOADS = False
+    STREAMING_DOWNLOADS = False
+    CONCURRENT_REQUESTS = False
+
+    #: Maximum number of redirects followed for a request.
+    MAX_REDIRECTS = 30
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.transport = AsyncTransport()
+        self.reset()
+
+    def reset(self):
+        self.response = None
+        self.previous_make_request = None
+        self.cookies = requests.cookies.RequestsCookieJar()
+        self.headers = {}
+
+    @remembering_for_reload
+    async def make_request(self, method, url, data=None, headers=None,
+                           referer_url=None, stream=False):
+        if urlsplit(url).hostname == 'nohost':
+            raise ZServerRequired()
+
+        if self.browser.exception_bubbling:
+            raise ValueError('The asyncio driver does not support'
+                             ' exception bubbling.')
+
+        request_headers = dict(self.headers)
+        request_headers.update(headers or {})
+        if referer_url and referer_url.strip():
+            request_headers['REFERER'] = referer_url
+            request_headers['HTTP_REFERER'] = referer_url
+
+        body = self._encode_data(data, request_headers)
+        for _ in range(self.MAX_REDIRECTS + 1):
+            self.response = await self._send(method, url, request_headers,
+                                              body)
+            location = self.response.headers.get('Location')
+            if not self.browser.allow_redirects \
+               or self.response.status_code not in REDIRECT_STATUS_CODES \
+               or not location:
+                break
+
+            url = urljoin(url, location)
+            if (self.response.status_code == 303 and method != 'HEAD') \
+               or (self.response.status_code in (301, 302)
+                   and method == 'POST'):
+                method = 'GET'
+                body = None
+                request_headers.pop('Content-Type', None)
+        else:
+            raise RedirectLoopException(url)
+
+        return (self.response.status_code,
+                self.response.reason,
+                None if stream else self.response.content)
+
+    def reload(self):
+        if self.previous_make_request is None:
+            raise BlankPage('Cannot reload.')
+        return self.previous_make_request()
+
+    def get_response_body(self):
+        if self.response is None:
+            raise BlankPage()
+        return self.response.content
+
+    def iter_response_body(self, chunk_size):
+        return iter_chunks(self.get_response_body(), chunk_size)
+
+    def get_url(self):
+        if self.response is None:
+            return None
+        return self.response.url
+
+    def get_response_headers(self):
+        if self.response is None:
+            return {}
+        headers = requests.structures.CaseInsensitiveDict()
+        for name, value in self.response.headers.items():
+            if name in headers:
+                value = ', '.join((headers[name], value))
+            headers[name] = value
+        return headers
+
+    def get_response_cookies(self):
+        cookies = {}
+        for domain_cookies in self.cookies._cookies.values():
+            for path_cookies in domain_cookies.values():
+                for cookie_name, cookie in path_cookies.items():
+                    cookies[cookie_name] = vars(cookie)
+        return cookies
+
+    def append_request_header(self, name, value):
+        if name in self.headers:
+            raise NameError(
+                ('There is already a header "{}" and the asyncio driver'
+                 ' does not support using the same header multiple times.')
+                .format(name))
+
+        self.headers[name] = value.strip()
+
+    def clear_request_header(self, name):
+        self.headers.pop(name, None)
+
+    def cloned(self, subbrowser):
+        subdriver = subbrowser.get_driver(self.LIBRARY_NAME)
+        subdriver.transport = self.transport
+        requests.cookies.merge_cookies(subdriver.cookies, self.cookies)
+
+    async def _send(self, method, url, headers, body):
+        cookie_request = Request(url, method=method)
+        self.cookies.add_cookie_header(cookie_request)
+        headers = dict(headers, **cookie_request.unredirected_hdrs)
+
+        status_code, reason, response_headers, content = \
+            await self.transport.request(method, url, headers, body)
+        self.cookies.extract_cookies(CookieResponse(response_headers),
+                                     cookie_request)
+        return AsyncResponse(url, status_code, reason, response_headers,
+                             content)
+
+    def _encode_data(self, data, headers):
+        if data is None:
+            return None
+
+        if hasattr(data, 'read'):
+            data.seek(0)
+            data = data.read()
+
+        if isinstance(data, str):
+            return data.encode('utf-8')
+
+        if isinstance(data, bytes):
+            return data
+
+        headers.setdefault('Content-Type',
+                           'application/x-www-form-urlencoded')
+        return urlencode(data, doseq=True).encode('utf-8')
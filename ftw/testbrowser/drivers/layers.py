@@ -15,4 +15,9 @@ class DefaultDriverFixture(Layer):
 
     def tearDown(self):
         from ftw.testbrowser import browser
+        from ftw.testbrowser import LIB_REQUESTS
+        from ftw.testbrowser.drivers.requestsdriver import RequestsDriver
         browser.default_driver = self.previous_default_driver
+        if self.library_constant == LIB_REQUESTS:
+            # The connections of the pool are no longer used.
+            RequestsDriver.close_pool()
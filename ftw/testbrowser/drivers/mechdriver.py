@@ -5,6 +5,7 @@ from ftw.testbrowser.exceptions import BrowserNotSetUpException
 from ftw.testbrowser.exceptions import RedirectLoopException
 from ftw.testbrowser.interfaces import IDriver
 from ftw.testbrowser.utils import copy_docs_from_interface
+from ftw.testbrowser.utils import iter_chunks
 from mechanize import Request
 from mechanize._urllib2_fork import HTTPRedirectHandler
 from requests.structures import CaseInsensitiveDict
@@ -34,6 +35,9 @@ class MechanizeDriver(object):
     """
     LIBRARY_NAME = 'mechanize library'
     WEBDAV_SUPPORT = False
+    STREAMING_UPLOADS = False
+    STREAMING_DOWNLOADS = False
+    CONCURRENT_REQUESTS = False
 
     def __init__(self, browser):
         self.browser = browser
@@ -46,7 +50,8 @@ class MechanizeDriver(object):
 
     @remembering_for_reload
     @isolated
-    def make_request(self, method, url, data=None, headers=None, referer_url=None):
+    def make_request(self, method, url, data=None, headers=None, referer_url=None,
+                     stream=False):
         if not self.browser.allow_redirects:
             raise ValueError('The mechanize driver does not support changing the redirect following behaviour.')
 
@@ -74,7 +79,9 @@ class MechanizeDriver(object):
             self.response = None
             raise
 
-        return self.response.code, self.response.msg, self.response
+        return (self.response.code,
+                self.response.msg,
+                None if stream else self.response)
 
     def reload(self):
         if self.previous_make_request is None:
@@ -88,6 +95,9 @@ class MechanizeDriver(object):
         self.response.seek(0)
         return self.response.read()
 
+    def iter_response_body(self, chunk_size):
+        return iter_chunks(self.get_response_body(), chunk_size)
+
     def get_url(self):
         if self.response is None:
             return None
@@ -148,6 +158,11 @@ class MechanizeDriver(object):
             # We already have a payload, e.g. a MIME request.
             return data
 
+        if hasattr(data, 'read'):
+            # mechanize cannot stream request bodies.
+            data.seek(0)
+            return data.read()
+
         if isinstance(data, dict):
             data = data.items()
 
@@ -0,0 +1,58 @@
+from ftw.testbrowser.drivers.staticdriver import StaticDriver
+from ftw.testbrowser.exceptions import BlankPage
+from ftw.testbrowser.utils import copy_docs_from_interface
+from requests.structures import CaseInsensitiveDict
+
+
+@copy_docs_from_interface
+class ReplayDriver(StaticDriver):
+    """The replay driver serves the responses of a cassette recorded with
+    :py:func:`ftw.testbrowser.core.Browser.recording` without doing actual
+    requests, so that neither Zope nor a server is required.
+    The cassette is loaded with :py:func:`ftw.testbrowser.core.Browser.replay`.
+    """
+    LIBRARY_NAME = 'replay driver'
+
+    def reset(self):
+        super(ReplayDriver, self).reset()
+        self.cassette = None
+        self.interaction = None
+
+    def make_request(self, method, url, data=None, headers=None,
+                     referer_url=None, stream=False):
+        if self.cassette is None:
+            raise ValueError('The replay driver has no cassette,'
+                             ' use browser.replay(path).')
+
+        self.interaction = self.cassette.play(method, url, data=data,
+                                              headers=headers)
+        self.set_body(self.interaction['body'])
+        return (self.interaction['status_code'],
+                self.interaction['status_reason'],
+                None if stream else self.body)
+
+    def reload(self):
+        if self.interaction is None:
+            raise BlankPage('Cannot reload.')
+        return (self.interaction['status_code'],
+                self.interaction['status_reason'],
+                self.body)
+
+    def get_url(self):
+        if self.interaction is None:
+            return None
+        return self.interaction['final_url']
+
+    def get_response_headers(self):
+        if self.interaction is None:
+            return {}
+        return CaseInsensitiveDict(self.interaction['headers'])
+
+    def get_response_cookies(self):
+        if self.interaction is None:
+            return {}
+        return self.interaction['cookies']
+
+    def cloned(self, subbrowser):
+        subdriver = subbrowser.get_driver(self.LIBRARY_NAME)
+        subdriver.cassette = self.cassette
@@ -1,10 +1,10 @@
 from ftw.testbrowser.drivers.utils import remembering_for_reload
+from ftw.testbrowser.drivers.utils import rewind
 from ftw.testbrowser.exceptions import BlankPage
 from ftw.testbrowser.exceptions import RedirectLoopException
 from ftw.testbrowser.exceptions import ZServerRequired
 from ftw.testbrowser.interfaces import IDriver
 from ftw.testbrowser.utils import copy_docs_from_interface
-from six import BytesIO
 from zope.interface import implementer
 
 import requests
@@ -19,22 +19,66 @@ class RequestsDriver(object):
     """
     LIBRARY_NAME = 'requests library'
     WEBDAV_SUPPORT = True
+    STREAMING_UPLOADS = True
+    STREAMING_DOWNLOADS = True
+    CONCURRENT_REQUESTS = True
+
+    #: Number of connections per host kept open by the connection pool.
+    POOL_SIZE = requests.adapters.DEFAULT_POOLSIZE
+
+    #: Number of retries of failed connections.
+    MAX_RETRIES = requests.adapters.DEFAULT_RETRIES
+
+    #: The adapter with the connection pool shared by all requests drivers.
+    _adapter = None
 
     def __init__(self, browser):
         self.browser = browser
         self.requests_session = None
+        self.response = None
+        self.adapter = None
         self.reset()
 
+    @classmethod
+    def get_adapter(klass):
+        """Returns the HTTP adapter, whose connection pool is shared by the
+        requests drivers of all browsers, including cloned browsers, so that
+        the connections are kept alive between tests.
+        The pool is configured with ``POOL_SIZE`` and ``MAX_RETRIES`` when
+        it is created.
+
+        :returns: The HTTP adapter.
+        :rtype: :py:class:`requests.adapters.HTTPAdapter`
+        """
+        if klass._adapter is None:
+            klass._adapter = requests.adapters.HTTPAdapter(
+                pool_connections=klass.POOL_SIZE,
+                pool_maxsize=klass.POOL_SIZE,
+                max_retries=klass.MAX_RETRIES)
+        return klass._adapter
+
+    @classmethod
+    def close_pool(klass):
+        """Closes the connections of the shared pool, e.g. when the server
+        is shut down. A new pool is created for the next session.
+        """
+        if klass._adapter is not None:
+            klass._adapter.close()
+            klass._adapter = None
+
     def reset(self):
+        self._close_response()
         self.response = None
         self.previous_make_request = None
-        if self.requests_session is not None:
-            self.requests_session.close()
+        # Only the session state, such as cookies and headers, is reset.
+        # The adapter is shared by the sessions, so that the connections
+        # of its pool are kept alive between tests.
         self.requests_session = requests.Session()
+        self._mount_adapter(self.get_adapter())
 
     @remembering_for_reload
     def make_request(self, method, url, data=None, headers=None,
-                     referer_url=None):
+                     referer_url=None, stream=False):
         if six.moves.urllib.parse.urlparse(url).hostname == 'nohost':
             raise ZServerRequired()
 
@@ -49,15 +93,17 @@ class RequestsDriver(object):
             headers['REFERER'] = referer_url
             headers['HTTP_REFERER'] = referer_url
 
+        self._close_response()
         try:
             self.response = self.requests_session.request(
-                method, url, data=data, headers=headers, allow_redirects=self.browser.allow_redirects)
+                method, url, data=rewind(data), headers=headers, allow_redirects=self.browser.allow_redirects,
+                stream=stream)
         except requests.exceptions.TooManyRedirects as exc:
             raise RedirectLoopException(exc.request.url)
 
         return (self.response.status_code,
                 self.response.reason,
-                BytesIO(self.response.content))
+                None if stream else self.response.content)
 
     def reload(self):
         if self.previous_make_request is None:
@@ -69,6 +115,11 @@ class RequestsDriver(object):
             raise BlankPage()
         return self.response.content
 
+    def iter_response_body(self, chunk_size):
+        if self.response is None:
+            raise BlankPage()
+        return self.response.iter_content(chunk_size)
+
     def get_url(self):
         if self.response is None:
             return None
@@ -103,5 +154,18 @@ class RequestsDriver(object):
 
     def cloned(self, subbrowser):
         subdriver = subbrowser.get_driver(self.LIBRARY_NAME)
+        subdriver._mount_adapter(self.adapter)
         requests.cookies.merge_cookies(subdriver.requests_session.cookies,
                                        self.requests_session.cookies)
+
+    def _mount_adapter(self, adapter):
+        self.adapter = adapter
+        self.requests_session.mount('http://', adapter)
+        self.requests_session.mount('https://', adapter)
+
+    def _close_response(self):
+        """Releases the connection of a streamed response, which was not
+        read completely.
+        """
+        if self.response is not None:
+            self.response.close()
@@ -1,6 +1,7 @@
 from ftw.testbrowser.exceptions import BlankPage
 from ftw.testbrowser.interfaces import IDriver
 from ftw.testbrowser.utils import copy_docs_from_interface
+from ftw.testbrowser.utils import iter_chunks
 from zope.interface import implementer
 
 import six
@@ -14,6 +15,9 @@ class StaticDriver(object):
     """
     LIBRARY_NAME = 'static driver'
     WEBDAV_SUPPORT = False
+    STREAMING_UPLOADS = False
+    STREAMING_DOWNLOADS = False
+    CONCURRENT_REQUESTS = False
 
     def __init__(self, browser):
         self.browser = browser
@@ -29,7 +33,7 @@ class StaticDriver(object):
             self.body = body
 
     def make_request(self, method, url, data=None, headers=None,
-                     referer_url=None):
+                     referer_url=None, stream=False):
         raise NotImplementedError(
             'The StaticDriver does not support making requests.')
 
@@ -43,6 +47,9 @@ class StaticDriver(object):
             raise BlankPage()
         return self.body
 
+    def iter_response_body(self, chunk_size):
+        return iter_chunks(self.get_response_body(), chunk_size, close=False)
+
     def get_url(self):
         return None
 
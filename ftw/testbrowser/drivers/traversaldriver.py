@@ -18,8 +18,9 @@ IMPLEMENTATION:
 The traversal driver works quite a lot like Mechanize is set up internally
 by plone.app.testing: it calls ``publish_module`` at the end.
 
-For the session handling (cookies, authorization headers) and the request
-preparation we use the ``requests`` module.
+The session state (cookies, headers) is kept in a cookie jar and a header
+dict of the ``requests`` module. The Zope environ is built directly from the
+request arguments and the cookies are read from the Zope response object.
 """
 
 
@@ -28,10 +29,12 @@ from ftw.testbrowser.drivers.utils import ensure_plone_catalog_queue_processed
 from ftw.testbrowser.drivers.utils import ensure_plone_protect_changes_marked_as_save
 from ftw.testbrowser.drivers.utils import isolated
 from ftw.testbrowser.drivers.utils import remembering_for_reload
+from ftw.testbrowser.drivers.utils import rewind
 from ftw.testbrowser.exceptions import BlankPage
 from ftw.testbrowser.exceptions import RedirectLoopException
 from ftw.testbrowser.interfaces import IDriver
 from ftw.testbrowser.utils import copy_docs_from_interface
+from ftw.testbrowser.utils import iter_chunks
 from requests.structures import CaseInsensitiveDict
 from six import BytesIO
 from six import StringIO
@@ -45,7 +48,8 @@ from ZPublisher.Test import publish_module
 
 import gzip
 import requests
-import six.moves.http_client
+import six
+import six.moves.urllib.request
 import sys
 import Zope2
 import ZPublisher
@@ -54,12 +58,45 @@ import ZPublisher
 # from plone.testing._z2_testbrowser
 class TestResponse(Response):
 
+    #: When streaming, stream iterator bodies are kept as they are,
+    #: so that they can be read in chunks later.
+    streaming = False
+    stream_iterator = None
+
     def setBody(self, body, title='', is_error=0, **kw):
         if IStreamIterator.providedBy(body):
+            if self.streaming:
+                self.stream_iterator = body
+                return self
             body = ''.join(body)
         Response.setBody(self, body, title, is_error, **kw)
 
 
+class ResponseCookies(object):
+    """Provides the ``Set-Cookie`` headers of a Zope response to a cookie jar,
+    which expects a ``urllib`` response.
+    """
+
+    def __init__(self, response):
+        self.set_cookie_headers = []
+        for cookie in response._cookie_list():
+            # Zope 4 returns header tuples, Zope 2 returns header lines.
+            if not isinstance(cookie, tuple):
+                cookie = cookie.split(':', 1)
+            self.set_cookie_headers.append(cookie[1].strip())
+
+    def info(self):
+        return self
+
+    def get_all(self, name, default=None):
+        if name.lower() == 'set-cookie':
+            return self.set_cookie_headers
+        return default
+
+    def getheaders(self, name):
+        return self.get_all(name, [])
+
+
 class NoCommitTransactionsManagerWrapper(object):
     """
     On startup, Zope creates a ``ZApplicationWrapper`` instance and stores it
@@ -189,6 +226,9 @@ class TraversalDriver(object):
     """
     LIBRARY_NAME = 'traversal library'
     WEBDAV_SUPPORT = True
+    STREAMING_UPLOADS = True
+    STREAMING_DOWNLOADS = True
+    CONCURRENT_REQUESTS = False
 
     def __init__(self, browser):
         self.browser = browser
@@ -199,25 +239,24 @@ class TraversalDriver(object):
         self.response = None
         self.current_url = None
         self.previous_make_request = None
-        self.requests_session = requests.Session()
+        self.cookies = requests.cookies.RequestsCookieJar()
+        self.headers = requests.utils.default_headers()
         self.append_request_header('X-zope-handle-errors', 'False')
 
     @remembering_for_reload
     @isolated
     def make_request(self, method, url, data=None, headers=None,
-                     referer_url=None):
+                     referer_url=None, stream=False):
         if headers is None:
             headers = {}
 
-        # The prepared_request is from the requests library and will be used
-        # for extracting the cookies later. It is not used while publishing.
-        # The zope_request is used for publishing.
-        prepared_request, zope_request, response = self._prepare_for_request(
+        url, zope_request, response = self._prepare_for_request(
             method=method,
             url=url,
             data=data,
             headers=headers,
             referer_url=referer_url)
+        response.streaming = stream
 
         # RequestContainer / Request Acquisition:
         # Views may get the request object through acquisition, for instance
@@ -246,17 +285,24 @@ class TraversalDriver(object):
                 self.current_url = None
                 raise
 
-        self._extract_cookies(prepared_request, response)
+        self._extract_cookies(url, response)
         self.response = response
-        self.current_url = prepared_request.url
+        self.current_url = url
 
         if self.browser.allow_redirects and self.response.status in (301, 302, 303):
-            return self._follow_redirects(method, data, headers)
-        else:
+            return self._follow_redirects(method, data, headers, stream)
+
+        if self.response.stream_iterator is None:
+            # The body is not streamed by Zope but already in memory, thus it
+            # is decoded even when the caller streams it.
             self._unzip_gzip_response()
+
+        if stream:
+            return self.response.status, self.response.errmsg, None
+        else:
             return (self.response.status,
                     self.response.errmsg,
-                    BytesIO(self.response.body))
+                    self.response.body)
 
     def _prepare_for_request(self, method, url, data, headers, referer_url):
         if referer_url:
@@ -266,28 +312,37 @@ class TraversalDriver(object):
             headers['REFERER'] = ''
             headers['HTTP_REFERER'] = ''
 
-        # Use the requests library for creating a request because it can make
-        # the body string for us (e.g. multipart MIME bodies).
-        request = self.requests_session.prepare_request(
-            requests.models.Request(
-                method=method,
-                url=url,
-                data=data,
-                headers=headers))
-
-        urlinfo = urlparse(request.url)
+        url = requests.utils.requote_uri(url)
+        urlinfo = urlparse(url)
         env = {
-            'ACTUAL_URL': request.url,
+            'ACTUAL_URL': url,
             'HTTP_HOST': urlinfo.hostname,
-            'PATH_INFO': unquote(urlinfo.path),
-            'PATH_TRANSLATED': urlinfo.path,
+            'PATH_INFO': unquote(urlinfo.path or '/'),
+            'PATH_TRANSLATED': urlinfo.path or '/',
             'QUERY_STRING': urlinfo.query,
-            'REQUEST_METHOD': request.method,
+            'REQUEST_METHOD': method.upper(),
             'SERVER_NAME': urlinfo.hostname,
             'SERVER_PORT': str(urlinfo.port or 80),
         }
 
-        for name, value in request.headers.items():
+        request_headers = self.headers.copy()
+        request_headers.update(headers)
+        body = self._encode_body(data, request_headers)
+        if body is not None:
+            request_headers['Content-Length'] = str(
+                requests.utils.super_len(body))
+        elif method.upper() not in ('GET', 'HEAD'):
+            request_headers['Content-Length'] = '0'
+
+        cookie_request = six.moves.urllib.request.Request(url)
+        self.cookies.add_cookie_header(cookie_request)
+        if cookie_request.has_header('Cookie'):
+            request_headers['Cookie'] = cookie_request.get_header('Cookie')
+
+        for name, value in request_headers.items():
+            if value is None:
+                continue
+
             name = ('_'.join(name.upper().split('-')))
             if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
                 name = 'HTTP_' + name
@@ -299,36 +354,59 @@ class TraversalDriver(object):
 
         response = TestResponse(stdout=StringIO(), stderr=sys.stderr)
 
+        if hasattr(body, 'read'):
+            # Streamed request bodies, such as big multipart uploads,
+            # are read by the zope request directly from the file.
+            stdin = body
+        else:
+            stdin = BytesIO(body or b'')
+
         # craft a new zope request
         zrequest = ZPublisher.Request.Request(
-            stdin=StringIO(request.body or ''),
+            stdin=stdin,
             environ=env,
             response=response)
 
-        return request, zrequest, response
+        return url, zrequest, response
+
+    def _encode_body(self, data, headers):
+        """Encodes the request data to the request body.
+        Form data (dicts and lists of tuples) is URL encoded, strings are
+        encoded as UTF-8 and files are passed through.
+        """
+        if data is None:
+            return None
+
+        if hasattr(data, 'read'):
+            return rewind(data)
+
+        if isinstance(data, six.text_type):
+            return data.encode('utf-8')
+
+        if isinstance(data, six.binary_type):
+            return data
 
-    def _extract_cookies(self, request, response):
-        """Extract the cookies from the response into the current
-        requests session.
+        if 'Content-Type' not in headers:
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        body = requests.models.RequestEncodingMixin._encode_params(data)
+        if isinstance(body, six.text_type):
+            body = body.encode('utf-8')
+        return body
 
-        :param request: requests library request object
-        :type request: :py:class:`requests.models.PreparedRequest`
+    def _extract_cookies(self, url, response):
+        """Extract the cookies from the ``Set-Cookie`` headers of the response
+        into the cookie jar of the session.
+
+        :param url: The URL of the request.
+        :type url: string
         :param response: our drivers own testresponse
         :type response:
           :py:class:`ftw.testbrowser.drivers.traversaldriver.TestResponse`
         """
-        # inspired by requests.cookies.extract_cookies_to_jar
-
-        # Prepare the request object for cookielib compatibility:
-        req = requests.cookies.MockRequest(request)
-
-        # Prepare the response object for cookielib compatibility:
-        res = requests.cookies.MockResponse(
-            six.moves.http_client.HTTPMessage(StringIO(response.stdout.getvalue())))
-
-        self.requests_session.cookies.extract_cookies(res, req)
+        self.cookies.extract_cookies(ResponseCookies(response),
+                                     six.moves.urllib.request.Request(url))
 
-    def _follow_redirects(self, method, data, headers):
+    def _follow_redirects(self, method, data, headers, stream=False):
         redirect_url = self.get_response_headers().get('Location')
         if headers.get('X-Testbrowser-Last-Redirect-Location') == redirect_url:
             raise RedirectLoopException(redirect_url)
@@ -349,7 +427,8 @@ class TraversalDriver(object):
                                  url=redirect_url,
                                  data=redirect_data,
                                  headers=headers.copy(),
-                                 referer_url=self.current_url)
+                                 referer_url=self.current_url,
+                                 stream=stream)
 
     def _unzip_gzip_response(self):
         """When the response is gzip encoded, decode it inplace in the response
@@ -370,8 +449,20 @@ class TraversalDriver(object):
     def get_response_body(self):
         if self.response is None:
             raise BlankPage()
+        if self.response.stream_iterator is not None:
+            self.response.body = b''.join(self.iter_response_body(1 << 16))
         return self.response.body
 
+    def iter_response_body(self, chunk_size):
+        if self.response is None:
+            raise BlankPage()
+        if self.response.stream_iterator is None:
+            return iter_chunks(self.response.body, chunk_size)
+
+        iterator = self.response.stream_iterator
+        self.response.stream_iterator = None
+        return iter_chunks(iterator, chunk_size)
+
     def get_url(self):
         return self.current_url
 
@@ -382,27 +473,24 @@ class TraversalDriver(object):
 
     def get_response_cookies(self):
         cookies = {}
-        cookiejar = self.requests_session.cookies
-        for domain_cookies in cookiejar._cookies.values():
+        for domain_cookies in self.cookies._cookies.values():
             for path_cookies in domain_cookies.values():
                 for cookie_name, cookie in path_cookies.items():
                     cookies[cookie_name] = vars(cookie)
         return cookies
 
     def append_request_header(self, name, value):
-        if name in self.requests_session.headers:
+        if name in self.headers:
             raise NameError(
                 ('There is already a header "{}" and the requests driver'
                  ' does not support using the same header multiple times.')
                 .format(name))
 
-        self.requests_session.headers.update({name: value.strip()})
+        self.headers[name] = value.strip()
 
     def clear_request_header(self, name):
-        if name in self.requests_session.headers:
-            del self.requests_session.headers[name]
+        self.headers.pop(name, None)
 
     def cloned(self, subbrowser):
         subdriver = subbrowser.get_driver(self.LIBRARY_NAME)
-        requests.cookies.merge_cookies(subdriver.requests_session.cookies,
-                                       self.requests_session.cookies)
+        requests.cookies.merge_cookies(subdriver.cookies, self.cookies)
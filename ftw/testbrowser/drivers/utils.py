@@ -35,6 +35,15 @@ def remembering_for_reload(func):
     return wrapper
 
 
+def rewind(data):
+    """Rewinds a file-like request body, so that it can be sent again,
+    e.g. when reloading or following a redirect.
+    """
+    if hasattr(data, 'seek'):
+        data.seek(0)
+    return data
+
+
 def isolated(func):
     """Decorator for isolating the environment within a function.
     Isolates:
@@ -2,11 +2,15 @@ from __future__ import absolute_import
 from copy import deepcopy
 from ftw.testbrowser.drivers.utils import isolated
 from ftw.testbrowser.drivers.utils import remembering_for_reload
+from ftw.testbrowser.drivers.utils import rewind
 from ftw.testbrowser.exceptions import BlankPage
 from ftw.testbrowser.exceptions import RedirectLoopException
 from ftw.testbrowser.interfaces import IDriver
 from ftw.testbrowser.utils import copy_docs_from_interface
+from ftw.testbrowser.utils import iter_chunks
+from six.moves.urllib.request import Request
 from webtest import TestApp
+from webtest import TestRequest
 from zope.interface import implementer
 from ZPublisher.WSGIPublisher import publish_module
 from ZPublisher.WSGIPublisher import set_default_debug_exceptions
@@ -18,12 +22,35 @@ def wsgi_app(environ, start_response):
     return publish_module(environ, start_response)
 
 
+class ResponseCookies(object):
+    """Provides the ``Set-Cookie`` headers of a webob response to a cookie
+    jar, which expects a ``urllib`` response.
+    """
+
+    def __init__(self, response):
+        self.set_cookie_headers = response.headers.getall('Set-Cookie')
+
+    def info(self):
+        return self
+
+    def get_all(self, name, default=None):
+        if name.lower() == 'set-cookie':
+            return self.set_cookie_headers
+        return default
+
+    def getheaders(self, name):
+        return self.get_all(name, [])
+
+
 @copy_docs_from_interface
 @implementer(IDriver)
 class WebtestDriver(object):
 
     LIBRARY_NAME = 'webtest library'
     WEBDAV_SUPPORT = True
+    STREAMING_UPLOADS = True
+    STREAMING_DOWNLOADS = True
+    CONCURRENT_REQUESTS = True
 
     def __init__(self, browser):
         self.browser = browser
@@ -41,7 +68,7 @@ class WebtestDriver(object):
 
     @remembering_for_reload
     def make_request(self, method, url, data=None, headers=None,
-                     referer_url=None):
+                     referer_url=None, stream=False):
         self.current_url = url
         headers = headers or {}
 
@@ -55,9 +82,14 @@ class WebtestDriver(object):
         else:
             set_default_debug_exceptions(False)
 
-        if method.upper() == 'GET':
+        if stream and method.upper() == 'GET' and data is None:
+            self.response = self._request_streamed(url, headers)
+        elif method.upper() == 'GET':
             self.response = self.app.get(
                 url, params=data, headers=headers, expect_errors=True)
+        elif hasattr(data, 'read'):
+            self.response = self._request_with_body_file(
+                method, url, data, headers)
         elif method.upper() in ['POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS',
                                 'HEAD']:
             impl = getattr(self.app, method.lower())
@@ -71,15 +103,15 @@ class WebtestDriver(object):
         if (self.browser.allow_redirects
                 and self.response.status_code // 100 == 3):
             return self.follow_redirect(
-                method, url, data=data, headers=headers)
+                method, url, data=data, headers=headers, stream=stream)
         return (
             self.response.status_code,
             self.response.status[4:],
-            self.response.body,
+            None if stream else self.response.body,
         )
 
     def follow_redirect(self, method, url, data=None, headers=None,
-                        referer_url=None):
+                        referer_url=None, stream=False):
         if self.num_redirects > self.max_redirects:
             raise RedirectLoopException(url)
         self.num_redirects += 1
@@ -92,7 +124,7 @@ class WebtestDriver(object):
 
         return self.make_request(
             method, location, data=data, headers=headers,
-            referer_url=referer_url)
+            referer_url=referer_url, stream=stream)
 
     def reload(self):
         if self.previous_make_request is None:
@@ -104,6 +136,11 @@ class WebtestDriver(object):
             raise BlankPage()
         return self.response.body
 
+    def iter_response_body(self, chunk_size):
+        if self.response is None:
+            raise BlankPage()
+        return iter_chunks(self.response.app_iter, chunk_size)
+
     def get_url(self):
         return self.current_url
 
@@ -128,6 +165,22 @@ class WebtestDriver(object):
         subdriver.app.cookiejar._cookies = deepcopy(
             self.app.cookiejar._cookies)
 
+    def _request_with_body_file(self, method, url, body_file, headers):
+        # Streamed request bodies, such as big multipart uploads, are passed
+        # to the application as wsgi.input without reading them into memory.
+        rewind(body_file)
+        body_file.seek(0, 2)
+        content_length = body_file.tell()
+        body_file.seek(0)
+        request = TestRequest.blank(url, dict(self.app.extra_environ),
+                                    method=method.upper(), headers=headers)
+        # Setting the body file resets the content length, thus the content
+        # length must be set afterwards.
+        request.body_file = body_file
+        request.content_length = content_length
+        request.environ['paste.throw_errors'] = True
+        return self.app.do_request(request, expect_errors=True)
+
     def _encode_data(self, data, charset='utf8'):
         if isinstance(data, dict) or hasattr(data, 'items'):
             data = list(data.items())
@@ -140,3 +193,17 @@ class WebtestDriver(object):
                 encoded_data.append((k, v))
             return encoded_data
         return data
+
+    def _request_streamed(self, url, headers):
+        # webtest reads the complete app_iter of its responses, therefore
+        # streamed requests are sent to the application directly, keeping
+        # the app_iter of the response for iterating over the body.
+        request = TestRequest.blank(url, dict(self.app.extra_environ),
+                                    headers=headers)
+        cookie_request = Request(request.url)
+        self.app.cookiejar.add_cookie_header(cookie_request)
+        request.headers.update(cookie_request.unredirected_hdrs)
+        response = request.get_response(self.app.app, catch_exc_info=True)
+        self.app.cookiejar.extract_cookies(ResponseCookies(response),
+                                           cookie_request)
+        return response
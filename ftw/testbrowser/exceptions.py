@@ -35,7 +35,15 @@ class FormFieldNotFound(BrowserException):
         else:
             label_advice = ''
 
-        Exception.__init__(self, 'Could not find form field: "%s".%s' % (
+        if isinstance(label_or_name, (list, tuple)) \
+           and len(label_or_name) == 1:
+            label_or_name = label_or_name[0]
+
+        if isinstance(label_or_name, (list, tuple)):
+            Exception.__init__(self, 'Could not find form fields: "%s".%s' % (
+                '", "'.join(label_or_name), label_advice))
+        else:
+            Exception.__init__(self, 'Could not find form field: "%s".%s' % (
                 label_or_name, label_advice))
 
 
@@ -112,6 +120,18 @@ class RedirectLoopException(BrowserException):
         self.url = url
 
 
+class RequestNotRecorded(BrowserException):
+    """The replayed cassette has no recorded response for the request.
+    """
+
+    def __init__(self, method, url):
+        message = re.sub(r'\s+', ' ', self.__doc__.strip())
+        message += '\nRequest: {} {}'.format(method, url)
+        Exception.__init__(self, message)
+        self.method = method
+        self.url = url
+
+
 class HTTPError(IOError):
     """The request has failed.
 
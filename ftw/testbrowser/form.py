@@ -1,9 +1,12 @@
-from collections import defaultdict
+from collections import OrderedDict
 from ftw.testbrowser.exceptions import FormFieldNotFound
 from ftw.testbrowser.nodes import NodeWrapper
+from ftw.testbrowser.nodes import wrap_node
 from ftw.testbrowser.nodes import wrapped_nodes
 from ftw.testbrowser.utils import normalize_spaces
 from ftw.testbrowser.widgets.base import PloneWidget
+from functools import partial
+from operator import itemgetter
 from requests_toolbelt import MultipartEncoder
 from six import BytesIO
 from six.moves import map
@@ -13,6 +16,28 @@ import mimetypes
 import six.moves.urllib.error
 import six.moves.urllib.parse
 import six.moves.urllib.request
+import tempfile
+
+
+LABEL_TAGS = ('label', '{http://www.w3.org/1999/xhtml}label')
+
+LABELABLE_TAGS = ('button', 'input', 'select', 'textarea')
+
+#: Multipart request bodies bigger than this number of bytes are passed
+#: as a temporary file to drivers supporting streaming uploads.
+MULTIPART_SPOOL_SIZE = 1024 * 1024
+
+MULTIPART_CHUNK_SIZE = 64 * 1024
+
+NESTED_BUTTONS_XPATH = 'descendant::button[not(@form)]'
+
+FORM_BUTTONS_XPATH = (
+    'descendant::button[not(@form) or @form=$id] | //button[@form=$id]')
+
+WIDGET_LABEL_XPATH = (
+    '//label[normalize-space(text())=$label]'
+    ' | //div[contains(concat(" ", normalize-space(@class), " "), " label ")]'
+    '[normalize-space(text())=$label]')
 
 
 class Form(NodeWrapper):
@@ -29,17 +54,45 @@ class Form(NodeWrapper):
     @property
     @wrapped_nodes
     def inputs(self):
-        """Returns a list of all input nodes of this form.
+        """Returns a list of all input nodes of this form, followed by the
+        buttons of this form.
+        Buttons belong to the form when they are within the form or when
+        they reference the form id with the ``form`` attribute.
+        The nodes are looked up once per document.
 
         :returns: All input nodes
         :rtype: :py:class:`ftw.testbrowser.nodes.Nodes`
         """
-        inputs = list(self.node.inputs)
-
-        for button in self.browser.document.xpath("//button"):
-            inputs.append(button)
+        return self._input_nodes()
+
+    def _input_nodes(self):
+        inputs = self.browser._form_inputs.get(self.node, None)
+        if inputs is None:
+            inputs = list(self.node.inputs)
+            form_id = self.attrib.get('id', None)
+            if form_id:
+                inputs.extend(self.node.xpath(FORM_BUTTONS_XPATH, id=form_id))
+            else:
+                inputs.extend(self.node.xpath(NESTED_BUTTONS_XPATH))
+            self.browser._form_inputs[self.node] = inputs
         return inputs
 
+    @property
+    def field_index(self):
+        """The index of the fields and buttons of this form by name and label.
+        It is built once and dropped when the document caches of the browser
+        are invalidated.
+
+        :returns: The field index.
+        :rtype: :py:class:`ftw.testbrowser.form.FieldIndex`
+        """
+        index = self.browser._field_indexes.get(self.node, None)
+        if index is None:
+            index = FieldIndex(self)
+            # Wrapping the inputs may have invalidated the caches.
+            self.browser._field_indexes[self.node] = index
+        return index
+
     @wrapped_nodes
     def find_field(self, label_or_name):
         """Finds and returns a field by label or name.
@@ -49,23 +102,9 @@ class Form(NodeWrapper):
         :returns: The field node
         :rtype: :py:class:`ftw.testbrowser.nodes.NodeWrapper`
         """
-        label = normalize_spaces(label_or_name)
-
-        for input in self.inputs:
-            if input.name == label_or_name:
-                return input
-
-            if input.label is None:
-                continue
-
-            if label in (input.label.text,
-                         normalize_spaces(input.label.raw_text)):
-                return input
-
-            checkbox_labels = (input.label is not None
-                               and input.label.css('>span.label'))
-            if checkbox_labels and label == checkbox_labels.first.text:
-                return input
+        field = self.field_index.find_field(label_or_name)
+        if field is not None:
+            return field
 
         return self.find_widget(label_or_name)
 
@@ -93,18 +132,7 @@ class Form(NodeWrapper):
         :returns: The button node
         :rtype: :py:class:`ftw.testbrowser.nodes.NodeWrapper`
         """
-
-        for input in self.inputs:
-            try:
-                input_type = input.type
-            except AttributeError:
-                continue
-
-            if input_type not in ('submit', 'reset', 'button'):
-                continue
-
-            if input.value == label or input.text == label:
-                return input
+        return self.field_index.find_button(label)
 
     def fill(self, values):
         """Accepts a dict, where the key is the name or the label of a field
@@ -116,78 +144,99 @@ class Form(NodeWrapper):
         :returns: The form node.
         :rtype: :py:class:`ftw.testbrowser.form.Form`
         """
-        values = self.field_labels_to_names(values)
-
         def to_text(value):
             if isinstance(value, six.binary_type):
                 return value.decode('utf8')
             return value
-        values = dict([
-            tuple(map(to_text, item)) for item in values.items()])
 
         widgets = []
+        fields = self._resolve_fields(
+            [tuple(map(to_text, item)) for item in values.items()])
 
-        for fieldname, value in list(values.items()):
-            field = self.find_field(fieldname)
+        for fieldname, (field, value) in fields.items():
             if isinstance(field, PloneWidget):
                 widgets.append((field, value))
-                continue
 
             # lxml.html.formfill breaks textarea when filling.
             # see https://github.com/lxml/lxml/pull/127/files
-            if field and field.tag == 'textarea':
+            elif field is not None and field.tag == 'textarea':
                 field.node.text = value
-                del values[fieldname]
 
             # lxml.html.formfill cannot fill select fields properly.
-            if field and field.tag == 'select' and not field.get('multiple'):
+            elif field is not None and field.tag == 'select' \
+                    and not field.get('multiple'):
                 field.value = value
-                del values[fieldname]
 
             # lxml.html.formfill cannot handle file uploads.
             # We use mechanize to do this.
-            if field and field.tag == 'input' and field.type == 'file':
+            elif field is not None and field.tag == 'input' \
+                    and field.type == 'file':
                 field.set('value', value)
-                del values[fieldname]
-
-            # lxml.html.formfill expects the checkbox value to be the value
-            # of the field, otherwise it will not be checked.
-            # We like to be able to use `True` for checking the checkbox
-            # independent of the actual field value.
-            if field and field.tag == 'input' and field.type == 'checkbox' \
-                    and value is True:
-                values[fieldname] = field.node.attrib.get('value', 'on')
 
-        values = self._merge_already_checked_inputs(values)
-
-        lxml.html.formfill._fill_form(self.node, values)
+            else:
+                # lxml.html.formfill expects the checkbox value to be the
+                # value of the field, otherwise it will not be checked.
+                # We like to be able to use `True` for checking the checkbox
+                # independent of the actual field value.
+                if field is not None and field.tag == 'input' \
+                        and field.type == 'checkbox' and value is True:
+                    value = field.node.attrib.get('value', 'on')
+                self._fill_inputs(fieldname, value)
 
         for widget, value in widgets:
             widget.fill(value)
 
         return self
 
-    def _merge_already_checked_inputs(self, values):
-        # Given a form with an already checked input element (e.g.
-        # checked=checked), when this form is filled without changing the input
-        # element the lxml formfill unchecks the element.
-        # Therefore we need to re-add all already checked inputs to
-        # the values to fill unless the value is meant to be changed.
-        to_merge = defaultdict(list)
-
-        for input in self.inputs:
-            if input.name in values:
+    def _resolve_fields(self, items):
+        # Resolves the labels or names of all items in a single pass and
+        # returns an ordered dict of field names to a field / value tuple.
+        # All labels which cannot be resolved are reported at once.
+        fields = OrderedDict()
+        missing = []
+
+        for label_or_name, value in items:
+            field = self.find_field(label_or_name)
+            if field is None:
+                missing.append(label_or_name)
                 continue
 
-            input_type = input.attrib.get('type', '').lower()
-            if input_type not in ['checkbox', 'radio']:
+            name = getattr(field, 'name', None)
+            if name is None:
+                name = label_or_name
+            elif isinstance(field, PloneWidget):
+                # Widgets providing a name are filled by their name.
+                field = self.find_field(name)
+
+            fields[name] = (field, value)
+
+        if missing:
+            # The values may be a dict, report the labels in a stable order.
+            raise FormFieldNotFound(sorted(missing), self.field_labels)
+
+        return fields
+
+    def _fill_inputs(self, name, value):
+        # Fills the inputs with this name like lxml.html.formfill does,
+        # without touching the other inputs of the form.
+        if isinstance(value, list):
+            value = tuple(value)
+
+        index = 0
+        for input in self.field_index.groups.get(name, ()):
+            if lxml.html.formfill._takes_multiple(input):
+                if isinstance(value, tuple):
+                    lxml.html.formfill._fill_multiple(input, value)
+                else:
+                    lxml.html.formfill._fill_multiple(input, [value])
                 continue
 
-            if input.attrib.get('checked', None) is not None:
-                to_merge[input.name].append(input.attrib.get('value', 'on'))
-
-        values.update(to_merge)
-        return values
+            if isinstance(value, tuple):
+                if index < len(value):
+                    lxml.html.formfill._fill_single(input, value[index])
+            elif index == 0:
+                lxml.html.formfill._fill_single(input, value)
+            index += 1
 
     def submit(self, button=None):
         """Submits this form by clicking on the first submit button.
@@ -268,21 +317,7 @@ class Form(NodeWrapper):
         :returns: A list of label texts (and field names).
         :rtype: list of strings
         """
-        labels = []
-        for input in self.inputs:
-            label = (input.label is not None
-                     and normalize_spaces(input.label.text))
-            if label:
-                labels.append(label)
-            elif input.name:
-                labels.append(input.name)
-
-            checkbox_labels = (input.label is not None
-                               and input.label.css('>span.label'))
-            if checkbox_labels:
-                labels.append(checkbox_labels.first.text)
-
-        return labels
+        return list(self.field_index.field_labels)
 
     def find_widget(self, label):
         """Finds a Plone widget (div.field) in a form.
@@ -295,13 +330,7 @@ class Form(NodeWrapper):
 
         label = normalize_spaces(label)
 
-        label_node_xpath = '//label[normalize-space(text())="%s"]' % label
-        div_node_xpath = '//div[contains(concat(" ",' + \
-            'normalize-space(@class)," ")," label ")]' + \
-            '[normalize-space(text())="%s"]' % label
-        label_xpath = ' | '.join((label_node_xpath, div_node_xpath))
-
-        for label_node in self.xpath(label_xpath):
+        for label_node in self.xpath(WIDGET_LABEL_XPATH, label=label):
             if not label_node.within(self):
                 continue
 
@@ -347,11 +376,16 @@ class Form(NodeWrapper):
 
         request_body, request_headers = self._prepare_multipart_request(
             URL, values)
-        return self.browser.open(URL,
-                                 data=request_body,
-                                 headers=dict(request_headers),
-                                 method='POST',
-                                 referer=True)
+        try:
+            return self.browser.open(URL,
+                                     data=request_body,
+                                     headers=dict(request_headers),
+                                     method='POST',
+                                     referer=True)
+        finally:
+            if hasattr(request_body, 'close'):
+                # Closed by the browser with the next request.
+                self.browser._set_upload_body(request_body)
 
     def _prepare_multipart_request(self, URL, values):
         fields = []
@@ -365,9 +399,172 @@ class Form(NodeWrapper):
                 fields.append((field.name, field.mime_data()))
 
         encoder = MultipartEncoder(fields=fields)
-        value = encoder.to_string()
         http_headers = [('Content-Type', encoder.content_type)]
-        return value, http_headers
+
+        driver = self.browser.get_driver()
+        if encoder.len <= MULTIPART_SPOOL_SIZE \
+           or not getattr(driver, 'STREAMING_UPLOADS', False):
+            return encoder.to_string(), http_headers
+
+        # Large bodies are streamed to the driver from a temporary file,
+        # so that the uploaded files are not kept in memory.
+        body = tempfile.TemporaryFile()
+        for chunk in iter(partial(encoder.read, MULTIPART_CHUNK_SIZE), b''):
+            body.write(chunk)
+        body.seek(0)
+        return body, http_headers
+
+
+class FieldIndex(object):
+    """The field index maps the names and label texts of the fields of a
+    form and the labels of its buttons to the first matching node, and the
+    field names to all lxml input nodes with this name.
+    It is built in a single pass over the inputs of the form.
+    """
+
+    def __init__(self, form):
+        self.names = {}
+        self.groups = {}
+        self.labels = {}
+        self.buttons = {}
+        self.field_labels = []
+
+        # Wrapping the inputs may change labels, see TextAreaField, thus
+        # the inputs are wrapped before building the label map.
+        inputs = list(form.inputs)
+        label_map = LabelMap.of_document(form.node, form.browser)
+        for position, input in enumerate(inputs):
+            self._index(position, input, label_map)
+
+    def _index(self, position, input, label_map):
+        entry = (position, input)
+        self.names.setdefault(input.name, entry)
+        if input.name and input.tag != 'button':
+            self.groups.setdefault(input.name, []).append(input.node)
+
+        label = label_map.label_for(input.node)
+        label_text = None
+        checkbox_label = None
+        if label is not None:
+            label_text, raw_text, checkbox_label = label_map.texts(label)
+            self.labels.setdefault(label_text, entry)
+            self.labels.setdefault(raw_text, entry)
+            if checkbox_label is not None:
+                self.labels.setdefault(checkbox_label, entry)
+
+        if label_text:
+            self.field_labels.append(label_text)
+        elif input.name:
+            self.field_labels.append(input.name)
+
+        if checkbox_label is not None:
+            self.field_labels.append(checkbox_label)
+
+        if getattr(input, 'type', None) in ('submit', 'reset', 'button'):
+            self.buttons.setdefault(input.value, entry)
+            self.buttons.setdefault(input.text, entry)
+
+    def find_field(self, label_or_name):
+        """Returns the first field with this name or label or ``None``.
+
+        :param label_or_name: The label or the name of the field.
+        :type label_or_name: string
+        :returns: The field node or ``None``.
+        :rtype: :py:class:`ftw.testbrowser.nodes.NodeWrapper`
+        """
+        matches = [entry for entry in (
+            self.names.get(label_or_name, None),
+            self.labels.get(normalize_spaces(label_or_name), None))
+                   if entry is not None]
+        if not matches:
+            return None
+        return min(matches, key=itemgetter(0))[1]
+
+    def find_button(self, label):
+        """Returns the first button with this label or value or ``None``.
+
+        :param label: The label of the button.
+        :type label: string
+        :returns: The button node or ``None``.
+        :rtype: :py:class:`ftw.testbrowser.nodes.NodeWrapper`
+        """
+        entry = self.buttons.get(label, None)
+        return entry and entry[1]
+
+
+class LabelMap(object):
+    """The label map maps the fields of a document to their label, which
+    either references the field id with the ``for`` attribute or wraps the
+    field.
+    It is built in a single pass over the labels of the document.
+    """
+
+    def __init__(self, root, browser):
+        self.browser = browser
+        self.by_id = {}
+        self.wrapping = {}
+        self._texts = {}
+
+        for label in root.iter(*LABEL_TAGS):
+            field_id = label.attrib.get('for', None)
+            if field_id is not None:
+                self.by_id.setdefault(field_id, label)
+                continue
+
+            field = next(
+                (node for node in label.iter(*LABELABLE_TAGS)
+                 if node.attrib.get('type', '').lower() != 'hidden'),
+                None)
+            if field is not None:
+                self.wrapping.setdefault(field, label)
+
+    @classmethod
+    def of_document(klass, node, browser):
+        """Returns the label map of the document of a node, which is built
+        once and dropped when the document caches of the browser are
+        invalidated.
+
+        :param node: The lxml node.
+        :param browser: The browser instance.
+        :type browser: :py:class:`ftw.testbrowser.core.Browser`
+        :returns: The label map.
+        :rtype: :py:class:`ftw.testbrowser.form.LabelMap`
+        """
+        root = node.getroottree().getroot()
+        label_map = browser._label_maps.get(root, None)
+        if label_map is None:
+            label_map = browser._label_maps[root] = klass(root, browser)
+        return label_map
+
+    def label_for(self, field):
+        """Returns the label node of a field or ``None``.
+        A label referencing the field id is preferred over a wrapping label.
+
+        :param field: The lxml field node.
+        :returns: The lxml label node or ``None``.
+        """
+        field_id = field.attrib.get('id', None)
+        if field_id and field_id in self.by_id:
+            return self.by_id[field_id]
+        return self.wrapping.get(field, None)
+
+    def texts(self, label):
+        """Returns the texts of a label: the whitespace normalized text, the
+        whitespace normalized raw text and the text of a ``span.label``
+        child as used for checkboxes or ``None``.
+
+        :param label: The lxml label node.
+        :returns: A tuple of texts.
+        :rtype: tuple
+        """
+        if label not in self._texts:
+            label_node = wrap_node(label, self.browser)
+            checkbox_labels = label_node.css('>span.label')
+            self._texts[label] = (
+                label_node.text,
+                normalize_spaces(label_node.raw_text),
+                checkbox_labels.first.text if checkbox_labels else None)
+        return self._texts[label]
 
 
 class TextAreaField(NodeWrapper):
@@ -394,13 +591,24 @@ class TextAreaField(NodeWrapper):
             # no id attr at all.
             for_attribute = self.attrib['name'].replace('.', '-')
             self.attrib['id'] = for_attribute
+            # The element index contains the ids.
+            self.browser._element_index = None
+            self._drop_label_caches()
 
         else:
             return
 
-        label = self.body.xpath('//label[@for="%s"]' % for_attribute)
+        label = self.body.xpath('//label[@for=$id]', id=for_attribute)
         if len(label) > 0:
             self.node.label = label.first.node
+            self._drop_label_caches()
+
+    def _drop_label_caches(self):
+        # Only the label maps and the field indexes built from them depend
+        # on the labels; the other caches, such as the wrappers already
+        # handed out, stay valid.
+        self.browser._label_maps = {}
+        self.browser._field_indexes = {}
 
 
 class SubmitButton(NodeWrapper):
@@ -416,12 +624,17 @@ class SubmitButton(NodeWrapper):
     @property
     @wrapped_nodes
     def form(self):
-        """Returns the form of which this button is parent.
+        """Returns the form of which this button is parent or which is
+        referenced with the ``form`` attribute.
         It returns the first form node if it is a nested form.
 
         :returns: the form node
         :rtype: :py:class:`ftw.testbrowser.form.Form`
         """
+        form_id = self.attrib.get('form', None)
+        if form_id:
+            return self.xpath('//form[@id=$id]', id=form_id).first_or_none
+
         for node in self.iterancestors():
             if node.tag == 'form':
                 return node
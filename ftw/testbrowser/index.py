@@ -0,0 +1,224 @@
+from bisect import bisect_left
+from bisect import bisect_right
+from collections import defaultdict
+from collections import namedtuple
+from ftw.testbrowser.selectors import NODE_MODE
+from ftw.testbrowser.utils import LRUCache
+
+import re
+import six
+
+
+#: A parsed simple selector, consisting of an optional tag name, id,
+#: list of classes and value of the ``name`` attribute.
+SimpleSelector = namedtuple('SimpleSelector', ['tag', 'id', 'classes', 'name'])
+
+IDENTIFIER = r'-?[_a-zA-Z][_a-zA-Z0-9-]*'
+
+SIMPLE_SELECTOR_REGEX = re.compile(
+    r'^(?P<tag>{ident})?'
+    r'(?:#(?P<id>{ident}))?'
+    r'(?P<classes>(?:\.{ident})*)'
+    r'(?:\[name=(?:"(?P<dquoted>[^"\\]*)"'
+    r"|'(?P<squoted>[^'\\]*)'"
+    r'|(?P<unquoted>{ident}))\])?$'.format(ident=IDENTIFIER))
+
+CLASS_SEPARATOR = re.compile(r'[ \t\r\n]+')
+
+#: Process wide cache of parsed simple selectors.
+SIMPLE_SELECTOR_CACHE = LRUCache(maxsize=1024)
+
+
+def parse_simple_selector(css_selector, mode):
+    """Parses a CSS selector which can be answered by the element index.
+    Simple selectors consist of an optional tag name, an optional id,
+    any number of classes and optionally a ``name`` attribute condition in
+    this order, e.g. ``form``, ``#content``, ``dl.portalMessage`` or
+    ``input[name="title"]``.
+
+    :param css_selector: The CSS selector.
+    :type css_selector: string
+    :param mode: The translation mode of the selector.
+    :type mode: string
+    :returns: The parsed selector or ``None`` when the selector is not simple.
+    :rtype: :py:class:`ftw.testbrowser.index.SimpleSelector`
+    """
+    return SIMPLE_SELECTOR_CACHE.get((css_selector, mode), _parse)
+
+
+def _parse(key):
+    css_selector, mode = key
+    match = SIMPLE_SELECTOR_REGEX.match(css_selector.strip())
+    if not match:
+        return None
+
+    tag = match.group('tag')
+    if tag and mode == NODE_MODE:
+        # The HTML translator used for nodes matches element names
+        # case insensitive.
+        tag = tag.lower()
+
+    classes = tuple(filter(None, match.group('classes').split('.')))
+    name = next((value for value in match.group('dquoted', 'squoted',
+                                                 'unquoted')
+                 if value is not None), None)
+
+    selector = SimpleSelector(tag, match.group('id'), classes, name)
+    if selector == (None, None, (), None):
+        return None
+    return selector
+
+
+class ElementIndex(object):
+    """The element index maps ids, classes, tag names and ``name`` attributes
+    of a document to the elements in document order.
+    It is built in a single pass over the document.
+
+    Each element is numbered in pre-order, together with the number of its
+    last descendant, so that all indexed elements within a node are a
+    continuous slice of each index entry.
+    """
+
+    def __init__(self, root):
+        self.position = {}
+        self.end = {}
+        self.ids = defaultdict(_Bucket)
+        self.classes = defaultdict(_Bucket)
+        self.tags = defaultdict(_Bucket)
+        self.names = defaultdict(_Bucket)
+        self._build(root)
+
+    def _build(self, root):
+        nodes = []
+        for position, node in enumerate(root.iter()):
+            nodes.append(node)
+            self.position[node] = position
+
+            if not isinstance(node.tag, six.string_types):
+                # comments and processing instructions
+                continue
+
+            self.tags[node.tag].append(position, node)
+
+            attrib = node.attrib
+            if 'id' in attrib:
+                self.ids[attrib['id']].append(position, node)
+            if 'name' in attrib:
+                self.names[attrib['name']].append(position, node)
+            if attrib.get('class', None):
+                for klass in set(CLASS_SEPARATOR.split(attrib['class'])):
+                    if klass:
+                        self.classes[klass].append(position, node)
+
+        # Walking the document backwards, the last child of a node is
+        # always numbered before the node itself.
+        for position in range(len(nodes) - 1, -1, -1):
+            node = nodes[position]
+            if len(node):
+                self.end[node] = self.end[node[-1]]
+            else:
+                self.end[node] = position
+
+    def __contains__(self, node):
+        return node in self.position
+
+    def is_descendant(self, node, container):
+        """Tests whether an indexed node is a descendant of an indexed
+        container node, using the pre-order numbering.
+
+        :param node: The lxml node.
+        :param container: The lxml container node.
+        :returns: ``True`` when ``node`` is within ``container``.
+        :rtype: boolean
+        """
+        return (self.position[container]
+                < self.position[node]
+                <= self.end[container])
+
+    def select(self, css_selector, context=None, mode=None):
+        """Returns the elements matching a simple CSS selector in document
+        order.
+        When a ``context`` node is passed, only the context node and its
+        descendants are considered.
+
+        :param css_selector: The CSS selector.
+        :type css_selector: string
+        :param context: The lxml element limiting the scope or ``None``.
+        :param mode: The translation mode of the selector.
+        :type mode: string
+        :returns: A list of lxml elements or ``None`` when the selector is not
+          simple or the context node is not indexed.
+        :rtype: list
+        """
+        selector = parse_simple_selector(css_selector, mode)
+        if selector is None:
+            return None
+
+        if context is not None and context not in self:
+            return None
+
+        bucket = self._most_selective_bucket(selector)
+        if bucket is None:
+            return []
+
+        if context is None:
+            candidates = bucket.nodes
+        else:
+            candidates = bucket.slice(self.position[context],
+                                      self.end[context])
+
+        return [node for node in candidates if self._matches(node, selector)]
+
+    def _most_selective_bucket(self, selector):
+        if selector.id is not None:
+            return self.ids.get(selector.id)
+        if selector.name is not None:
+            return self.names.get(selector.name)
+        if selector.classes:
+            return min([self.classes.get(klass, _EMPTY_BUCKET)
+                        for klass in selector.classes],
+                       key=len)
+        return self.tags.get(selector.tag)
+
+    def _matches(self, node, selector):
+        if selector.tag is not None and node.tag != selector.tag:
+            return False
+
+        attrib = node.attrib
+        if selector.id is not None and attrib.get('id') != selector.id:
+            return False
+
+        if selector.name is not None and attrib.get('name') != selector.name:
+            return False
+
+        if len(selector.classes) > 1 or (
+                selector.classes and (selector.id or selector.name)):
+            classes = CLASS_SEPARATOR.split(attrib.get('class', ''))
+            if not set(selector.classes).issubset(classes):
+                return False
+
+        return True
+
+
+class _Bucket(object):
+    """A list of indexed nodes together with their positions, so that the
+    nodes of a document range can be found with bisection.
+    """
+
+    def __init__(self):
+        self.positions = []
+        self.nodes = []
+
+    def append(self, position, node):
+        self.positions.append(position)
+        self.nodes.append(node)
+
+    def slice(self, start, end):
+        return self.nodes[bisect_left(self.positions, start):
+                          bisect_right(self.positions, end)]
+
+    def __len__(self):
+        return len(self.nodes)
+
+
+_EMPTY_BUCKET = _Bucket()
@@ -36,7 +36,8 @@ class IDriver(Interface):
         internal state.
         """
 
-    def make_request(method, url, data=None, headers=None, referer_url=None):
+    def make_request(method, url, data=None, headers=None, referer_url=None,
+                     stream=False):
         """Make a request to the url and return the response body as string.
 
         :param method: The HTTP request method, all uppercase.
@@ -45,13 +46,25 @@ class IDriver(Interface):
         :type url: string
         :param data: A dict with data which is posted using a ``POST`` request,
           or the raw request body as a string.
-        :type data: dict or string
+          Drivers with ``STREAMING_UPLOADS`` may also receive the request
+          body as a file-like object, which should be streamed.
+        :type data: dict, string or file
         :param headers: A dict with custom headers for this request.
         :type headers: dict
         :param referer_url: The referer URL or ``None``.
         :type referer: string or ``None``
-        :returns: Status code, reason and body
-        :rtype: tuple: (int, string, string or stream)
+        :param stream: When enabled, the response body should not be loaded
+          but streamed by ``iter_response_body``.
+          Drivers with ``STREAMING_DOWNLOADS`` stream the body, the other
+          drivers load it anyway.
+        :type stream: bool
+        :returns: Status code, reason and body.
+          The body should be handed over as it is stored in the driver
+          (``bytes`` or ``memoryview``), without copying it into a stream,
+          so that large pages are not duplicated in memory.
+          Seekable streams are accepted too.
+          The body is ``None`` when ``stream`` is enabled.
+        :rtype: tuple: (int, string, bytes, memoryview or stream)
         """
 
     def reload():
@@ -61,7 +74,7 @@ class IDriver(Interface):
 
         :raises: :py:exc:`ftw.testbrowser.exceptions.BlankPage`
         :returns: Status code, reason and body
-        :rtype: tuple: (int, string, string or stream)
+        :rtype: tuple: (int, string, bytes, memoryview or stream)
         """
 
     def get_response_body():
@@ -72,6 +85,17 @@ class IDriver(Interface):
         :rtype: string
         """
 
+    def iter_response_body(chunk_size):
+        """Iterates over the response body of the last response in chunks.
+        Streamed responses are read while iterating, thus they can only be
+        iterated once.
+
+        :param chunk_size: The maximum size of a chunk in bytes.
+        :type chunk_size: int
+        :raises: :py:exc:`ftw.testbrowser.exceptions.BlankPage`
+        :returns: An iterator of bytes chunks.
+        """
+
     def get_url():
         """Returns the current url, if we are on a page, or None.
 
@@ -1,9 +1,13 @@
-from cssselect.xpath import HTMLTranslator
 from ftw.testbrowser.exceptions import NoElementFound
+from ftw.testbrowser.interfaces import IBrowser
 from ftw.testbrowser.queryinfo import QueryInfo
+from ftw.testbrowser.selectors import ANCESTOR_MODE
+from ftw.testbrowser.selectors import compile_xpath
+from ftw.testbrowser.selectors import css_to_xpath
+from ftw.testbrowser.selectors import NODE_MODE
 from ftw.testbrowser.utils import normalize_spaces
-from functools import reduce
 from functools import total_ordering
+from itertools import chain
 from operator import attrgetter
 from operator import methodcaller
 from six.moves import map
@@ -47,6 +51,12 @@ RESULT_SET_TYPES = (list,
 
 _marker = object()
 
+#: Maps tag names to wrapper classes. Tags wrapped depending on the ``type``
+#: attribute map to a dict of types and wrapper classes.
+#: It is loaded on first use, since the wrapper classes are defined in
+#: modules importing this module.
+TAG_WRAPPERS = {}
+
 
 def wrapped_nodes(func, browser=_marker):
     """A method decorator wrapping the returned results.
@@ -59,11 +69,11 @@ def wrapped_nodes(func, browser=_marker):
     else:
         def wrapper_method(self, *args, **kwargs):
             browser = getattr(self, 'browser', _marker)
-            if browser is _marker and self.__class__.__name__ == 'Browser':
+            if browser is _marker and IBrowser.providedBy(self):
                 browser = self
             if browser is _marker:
                 raise ValueError(
-                    '{1}.{2} uses the wrapped_nodes decorator but does not'
+                    '{0}.{1} uses the wrapped_nodes decorator but does not'
                     ' provide a `self.browser`.'.format(
                         self.__class__.__name__,
                         func.__name__))
@@ -87,10 +97,39 @@ def wrap_nodes(nodes, browser, query_info):
     if not isinstance(nodes, RESULT_SET_TYPES) and not is_generator:
         return wrap_node(nodes, browser)
 
-    result = Nodes(query_info=query_info)
-    for node in nodes:
-        result.append(wrap_node(node, browser))
-    return result
+    return Nodes.lazy(nodes, browser, query_info=query_info)
+
+
+def _load_tag_wrappers():
+    from ftw.testbrowser.form import FileField
+    from ftw.testbrowser.form import Form
+    from ftw.testbrowser.form import SelectField
+    from ftw.testbrowser.form import SubmitButton
+    from ftw.testbrowser.form import TextAreaField
+    from ftw.testbrowser.table import Table
+    from ftw.testbrowser.table import TableCell
+    from ftw.testbrowser.table import TableComponent
+    from ftw.testbrowser.table import TableRow
+
+    TAG_WRAPPERS.update({
+        'a': LinkNode,
+        'form': Form,
+        'input': {'submit': SubmitButton,
+                  'file': FileField},
+        'button': {'submit': SubmitButton},
+        'select': SelectField,
+        'textarea': TextAreaField,
+        'dl': DefinitionListNode,
+        'table': Table,
+        'tr': TableRow,
+        'td': TableCell,
+        'th': TableCell,
+        'colgroup': TableComponent,
+        'col': TableComponent,
+        'thead': TableComponent,
+        'tbody': TableComponent,
+        'tfoot': TableComponent,
+    })
 
 
 def wrap_node(node, browser):
@@ -103,56 +142,35 @@ def wrap_node(node, browser):
     if isinstance(node, NodeWrapper):
         return node
 
-    if node.tag == 'a':
-        return LinkNode(node, browser)
-
-    if node.tag == 'form':
-        from ftw.testbrowser.form import Form
-        return Form(node, browser)
-
-    if node.tag == 'input' and node.attrib.get('type', None) == 'submit':
-        from ftw.testbrowser.form import SubmitButton
-        return SubmitButton(node, browser)
-
-    if node.tag == 'button' and node.attrib.get('type', None) == 'submit':
-        from ftw.testbrowser.form import SubmitButton
-        return SubmitButton(node, browser)
-
-    if node.tag == 'input' and node.attrib.get('type', None) == 'file':
-        from ftw.testbrowser.form import FileField
-        return FileField(node, browser)
-
-    if node.tag == 'select':
-        from ftw.testbrowser.form import SelectField
-        return SelectField(node, browser)
-
-    if node.tag == 'textarea':
-        from ftw.testbrowser.form import TextAreaField
-        return TextAreaField(node, browser)
+    wrappers = getattr(browser, '_wrappers', None)
+    if wrappers is not None:
+        wrapper = wrappers.get(node, None)
+        if wrapper is not None:
+            return wrapper
 
-    if node.tag == 'dl':
-        return DefinitionListNode(node, browser)
+    wrapper = _create_wrapper(node, browser)
 
-    if node.tag == 'table':
-        from ftw.testbrowser.table import Table
-        return Table(node, browser)
+    # Creating the wrapper may invalidate the document caches.
+    wrappers = getattr(browser, '_wrappers', None)
+    if wrappers is not None:
+        wrappers[node] = wrapper
+    return wrapper
 
-    if node.tag == 'tr':
-        from ftw.testbrowser.table import TableRow
-        return TableRow(node, browser)
 
-    if node.tag in ('td', 'th'):
-        from ftw.testbrowser.table import TableCell
-        return TableCell(node, browser)
+def _create_wrapper(node, browser):
+    if not TAG_WRAPPERS:
+        _load_tag_wrappers()
 
-    if node.tag in ('colgroup', 'col', 'thead', 'tbody', 'tfoot'):
-        from ftw.testbrowser.table import TableComponent
-        return TableComponent(node, browser)
+    klass = TAG_WRAPPERS.get(node.tag, None)
+    if isinstance(klass, dict):
+        klass = klass.get(node.attrib.get('type', None), None)
+    if klass is not None:
+        return klass(node, browser)
 
-    from ftw.testbrowser.widgets.base import WIDGETS
-    for widget_klass in WIDGETS:
-        if widget_klass.match(NodeWrapper(node, browser)):
-            return widget_klass(node, browser)
+    from ftw.testbrowser.widgets.base import match_widget
+    klass = match_widget(node, browser)
+    if klass is not None:
+        return klass(node, browser)
 
     return NodeWrapper(node, browser)
 
@@ -167,8 +185,67 @@ class Nodes(list):
             self.query_info = kwargs.pop('query_info')
         else:
             self.query_info = None
+        self._unwrapped = None
+        self._wrapped = None
+        self._browser = None
         super(Nodes, self).__init__(*args, **kwargs)
 
+    @classmethod
+    def lazy(klass, nodes, browser, query_info=None):
+        """Creates a result set of unwrapped lxml nodes.
+        The nodes are only wrapped when they are accessed, so that taking
+        the ``first`` node or the ``len`` of a big result set does not wrap
+        all nodes.
+        Operations which need all nodes wrap all of them at once.
+
+        :param nodes: The lxml nodes.
+        :type nodes: list or iterable
+        :param browser: The browser instance used for wrapping the nodes.
+        :type browser: :py:class:`ftw.testbrowser.core.Browser`
+        :returns: The result set.
+        :rtype: :py:class:`ftw.testbrowser.nodes.Nodes`
+        """
+        result = klass(query_info=query_info)
+        if not isinstance(nodes, list):
+            nodes = list(nodes)
+        result._unwrapped = nodes
+        result._wrapped = {}
+        result._browser = browser
+        return result
+
+    def _materialize(self):
+        """Wraps all nodes which were not wrapped yet and stores them in
+        the list.
+        """
+        unwrapped = self._unwrapped
+        if unwrapped is None:
+            return
+
+        wrapped = self._wrapped
+        self._unwrapped = None
+        self._wrapped = None
+        list.extend(self, [wrapped[index] if index in wrapped
+                           else wrap_node(node, self._browser)
+                           for index, node in enumerate(unwrapped)])
+
+    def __len__(self):
+        if self._unwrapped is not None:
+            return len(self._unwrapped)
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        if self._unwrapped is not None \
+           and isinstance(index, six.integer_types):
+            node = self._unwrapped[index]
+            if index < 0:
+                index += len(self._unwrapped)
+            if index not in self._wrapped:
+                self._wrapped[index] = wrap_node(node, self._browser)
+            return self._wrapped[index]
+
+        self._materialize()
+        return list.__getitem__(self, index)
+
     @property
     def first(self):
         """The first element of the list.
@@ -253,15 +330,16 @@ class Nodes(list):
         :rtype: :py:class:`ftw.testbrowser.nodes.Nodes`
         """
         return Nodes(
-            reduce(list.__add__,
-                   map(methodcaller('css', css_selector, query_info), self)),
+            chain.from_iterable(
+                map(methodcaller('css', css_selector, query_info), self)),
             query_info=query_info)
 
     @QueryInfo.build
-    def xpath(self, xpath_selector, query_info):
+    def xpath(self, xpath_selector, query_info, **variables):
         """Find nodes by an *xpath* expression which are within one of the
         nodes in this result set.
         The resulting nodes are merged into a new result set.
+        Additional keyword arguments are passed as xpath variables.
 
         :param xpath_selector: The xpath selector.
         :type xpath_selector: string
@@ -269,8 +347,9 @@ class Nodes(list):
         :rtype: :py:class:`ftw.testbrowser.nodes.Nodes`
         """
         return Nodes(
-            reduce(list.__add__,
-                   map(methodcaller('xpath', xpath_selector, query_info), self)),
+            chain.from_iterable(
+                map(methodcaller('xpath', xpath_selector, query_info,
+                                 **variables), self)),
             query_info=query_info)
 
     def find(self, *args, **kwargs):
@@ -323,6 +402,39 @@ class Nodes(list):
         return self
 
 
+def _materializing(name):
+    method = getattr(list, name)
+
+    def wrapper(self, *args, **kwargs):
+        self._materialize()
+        for arg in args:
+            # list comparisons access the items of the other list directly.
+            if isinstance(arg, Nodes):
+                arg._materialize()
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = name
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+# The list methods working on all items must make sure that the nodes of
+# a lazy result set are wrapped and stored in the list.
+MATERIALIZING_METHODS = [
+    '__contains__', '__delitem__', '__eq__', '__ge__', '__gt__', '__iadd__',
+    '__imul__', '__iter__', '__le__', '__lt__', '__mul__', '__ne__',
+    '__reversed__', '__rmul__', '__setitem__', 'append', 'count', 'extend',
+    'index', 'insert', 'pop', 'remove', 'reverse', 'sort']
+
+if six.PY2:
+    MATERIALIZING_METHODS += ['__delslice__', '__getslice__', '__setslice__']
+else:
+    MATERIALIZING_METHODS += ['clear', 'copy']
+
+for _name in MATERIALIZING_METHODS:
+    setattr(Nodes, _name, _materializing(_name))
+
+
 @total_ordering
 class NodeWrapper(object):
     """`NodeWrapper` is the default wrapper class in which each element will be
@@ -397,34 +509,20 @@ class NodeWrapper(object):
         :rtype: :py:class:`ftw.testbrowser.nodes.Nodes`
         """
 
-        xpath = []
-
-        # When a direct child is selected (">x"), we need to prefix the xpath
-        # expression with "self::" rather than "descendant-or-self::" for not
-        # selecting the children of the children.
-        # "self::*/div"                 -->   ">div"
-        # "descendant-or-self::*/div"   -->   ">div, >* div"
-        # "descendant-or-self::div"     -->   "div"
-        translator = HTMLTranslator()
-
-        for css in css_selector.split(','):
-            css = css.strip()
-            if css.startswith('>'):
-                # The translator does not allow leading '>', because it is not
-                # context sensitive.
-                xpath.append(translator.css_to_xpath(
-                    css[1:], prefix='self::*/'))
-            else:
-                xpath.append(translator.css_to_xpath(
-                    css, prefix='descendant-or-self::'))
-
-        xpath_expr = ' | '.join(xpath)
+        index = getattr(self.browser, 'element_index', None)
+        if index is not None:
+            nodes = index.select(css_selector, context=self.node,
+                                 mode=NODE_MODE)
+            if nodes is not None:
+                return wrap_nodes(nodes, self.browser, query_info=query_info)
 
+        xpath_expr = css_to_xpath(css_selector, mode=NODE_MODE)
         return self.xpath(xpath_expr, query_info=query_info)
 
     @QueryInfo.build
-    def xpath(self, xpath_selector, query_info):
+    def xpath(self, xpath_selector, query_info, **variables):
         """Find nodes within this node by a *css* selector.
+        Additional keyword arguments are passed as xpath variables.
 
         :param css_selector: The CSS selector.
         :type css_selector: string
@@ -432,7 +530,8 @@ class NodeWrapper(object):
         :rtype: :py:class:`ftw.testbrowser.nodes.Nodes`
         """
         nsmap = self.node.getroottree().getroot().nsmap
-        return wrap_nodes(self.node.xpath(xpath_selector, namespaces=nsmap),
+        xpath = compile_xpath(xpath_selector, nsmap)
+        return wrap_nodes(xpath(self.node, **variables),
                           self.browser,
                           query_info=query_info)
 
@@ -465,8 +564,7 @@ class NodeWrapper(object):
             xpath = '*'
 
         if css:
-            translator = HTMLTranslator()
-            xpath = translator.css_to_xpath(css, prefix='')
+            xpath = css_to_xpath(css, mode=ANCESTOR_MODE)
 
         if not xpath.startswith('ancestor::'):
             xpath = 'ancestor::%s' % xpath
@@ -521,7 +619,17 @@ class NodeWrapper(object):
         :returns: `True` when `self` is within `other`.
         :rtype: boolean
         """
-        return container in tuple(self.iterancestors())
+        node = self.node
+        container = getattr(container, 'node', container)
+
+        index = getattr(self.browser, 'element_index', None)
+        if index is not None and node in index and container in index:
+            return index.is_descendant(node, container)
+
+        for ancestor in node.iterancestors():
+            if ancestor is container:
+                return True
+        return False
 
     @property
     def text(self):
@@ -678,8 +786,10 @@ class LinkNode(NodeWrapper):
 
     def click(self):
         """Clicks on the link, which opens the target in the current browser.
+
+        :returns: The browser object.
         """
-        self.browser.open(self.attrib['href'], referer=True)
+        return self.browser.open(self.attrib['href'], referer=True)
 
 
 class DefinitionListNode(NodeWrapper):
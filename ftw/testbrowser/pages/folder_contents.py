@@ -123,21 +123,36 @@ def row_by_title(title, browser=default_browser):
     :returns: The row node.
     :rtype: :py:class:`ftw.testbrowser.table.TableRow`
     """
-    cells = [cell for cell in title_cells(browser=browser) if cell.text == title]
+    rows = rows_by_title(browser=browser).rows(title)
 
-    if len(cells) == 0:
+    if len(rows) == 0:
         raise ValueError('No row with title "{0}" found.'.format(title))
 
-    elif len(cells) == 1:
-        return cells[0].row
+    elif len(rows) == 1:
+        return rows[0]
 
     else:
-        urls = [cell.css('a').first.attrib['href'] for cell in cells]
+        urls = [cell.css('a').first.attrib['href']
+                for cell in title_cells(browser=browser)
+                if cell.row in rows]
         raise ValueError(
             'More than one row with title "{0}" found: {1}'.format(
                 title, urls))
 
 
+@only_plone_4
+def rows_by_title(browser=default_browser):
+    """Returns an index of the rows by the title of the objects.
+
+    :param browser: A browser instance. (Default: global browser)
+    :type browser: :py:class:`ftw.testbrowser.core.Browser`
+    :returns: The rows indexed by title.
+    :rtype: :py:class:`ftw.testbrowser.table.TableIndex`
+    """
+    return table(browser=browser).index_by(
+        column_title_by_name('title', browser=browser), head_offset=1)
+
+
 @only_plone_4
 def row_by_object(obj, browser=default_browser):
     """Returns the row for an object.
@@ -4,6 +4,23 @@ from six.moves import map
 import inspect
 
 
+# Python 2 does not have getfullargspec.
+_getargspec = getattr(inspect, 'getfullargspec', None) or inspect.getargspec
+
+# Argument names and whether arbitrary keyword arguments are accepted,
+# by decorated function.
+_ARGSPECS = {}
+
+
+def _argspec(function):
+    if function not in _ARGSPECS:
+        argspec = _getargspec(function)
+        keywords = getattr(argspec, 'varkw', None) \
+            or getattr(argspec, 'keywords', None)
+        _ARGSPECS[function] = (argspec.args, bool(keywords))
+    return _ARGSPECS[function]
+
+
 class QueryInfo(object):
     """A QueryInfo object holds information about which query was executed
     in order to have better exception messages when content cannot be found.
@@ -11,6 +28,9 @@ class QueryInfo(object):
     For example, a QueryInfo object records a ``node.css('.foo')`` call so
     that we can tell the user which expression did not match.
     The QueryInfo object can be enriched with additional information.
+
+    The arguments of the call are only referenced and rendered when needed,
+    since queries are executed very often but rendered only on errors.
     """
 
     def __init__(self, function, args, kwargs):
@@ -21,22 +41,25 @@ class QueryInfo(object):
 
     @classmethod
     def build(klass, function):
-        argspec = inspect.getargspec(function)
-        if 'query_info' not in argspec.args and not argspec.keywords:
+        argument_names, keywords = _argspec(function)
+        if 'query_info' not in argument_names and not keywords:
             raise NameError(
                 'QueryInfo.build wrapped functions must accept a'
                 ' query_info argument or arbitrary keyword'
                 ' arguments (**kwargs).')
 
+        if 'query_info' in argument_names:
+            position = argument_names.index('query_info')
+        else:
+            position = None
+
         @wraps(function)
         def wrapper(*args, **kwargs):
-            if 'query_info' in kwargs:
-                pass
-            elif 'query_info' in argspec.args and  \
-                 len(args) > argspec.args.index('query_info'):
-                pass
-            else:
-                kwargs['query_info'] = klass(function, args[:], kwargs.copy())
+            if 'query_info' not in kwargs and (
+                    position is None or len(args) <= position):
+                # The kwargs dict is private to this call, the query_info
+                # key added here is skipped when rendering.
+                kwargs['query_info'] = klass(function, args, kwargs)
             return function(*args, **kwargs)
         return wrapper
 
@@ -74,7 +97,7 @@ class QueryInfo(object):
         :returns: The method call.
         :rtype: string
         """
-        argument_names = inspect.getargspec(self.function).args
+        argument_names = _argspec(self.function)[0]
         positional_arguments = list(self.args)
         if argument_names[0] == 'self':
             # we have an instance method
@@ -89,19 +112,16 @@ class QueryInfo(object):
             # we have a module function
             context = inspect.getmodule(self.function).__name__.split('.')[-1]
 
-        keyword_names = []
-        keyword_values = []
-        keyword_order = argument_names + sorted(self.kwargs.keys())
-        for name, value in sorted(
-                self.kwargs.items(),
-                key=lambda item: keyword_order.index(item[0])):
-            keyword_names.append(name)
-            keyword_values.append(value)
+        kwargs = dict((name, value) for name, value in self.kwargs.items()
+                      if name != 'query_info')
+        keyword_order = argument_names + sorted(kwargs.keys())
+        keyword_arguments = [
+            '{}={!r}'.format(name, value) for name, value in sorted(
+                kwargs.items(),
+                key=lambda item: keyword_order.index(item[0]))]
 
-        return '{}.{}{}'.format(
+        return '{}.{}({})'.format(
             context,
             self.function.__name__,
-            inspect.formatargspec(
-                list(map(repr, positional_arguments)) + keyword_names,
-                None, None,
-                keyword_values))
+            ', '.join(list(map(repr, positional_arguments))
+                      + keyword_arguments))
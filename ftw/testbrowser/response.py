@@ -0,0 +1,100 @@
+from ftw.testbrowser.parser import TestbrowserHTMLParser
+from six import BytesIO
+
+import json
+import lxml.html
+import re
+import six
+
+
+class PageResponse(object):
+    """A lightweight response of a page fetched with
+    :py:func:`ftw.testbrowser.core.Browser.open_many`.
+    The document is only parsed when it is accessed.
+
+    :ivar url: The requested URL.
+    :ivar final_url: The URL of the response, after following redirects.
+    :ivar status_code: The status code or ``None`` when the request failed.
+    :ivar status_reason: The status reason or ``None``.
+    :ivar headers: The response headers.
+    :ivar body: The binary response content.
+    :ivar error: The exception raised while fetching the page or ``None``.
+    """
+
+    def __init__(self, url, final_url=None, status_code=None,
+                 status_reason=None, headers=None, body=b'', error=None):
+        self.url = url
+        self.final_url = final_url
+        self.status_code = status_code
+        self.status_reason = status_reason
+        self.headers = headers if headers is not None else {}
+        self.body = body
+        self.error = error
+        self._document = None
+
+    @classmethod
+    def from_driver(klass, url, driver, response):
+        """Creates the response of a page from the state of the driver after
+        making the request.
+
+        :param url: The requested URL.
+        :param driver: The driver which made the request.
+        :param response: The status code, reason and body returned by
+          ``make_request``.
+        :returns: The page response.
+        :rtype: :py:class:`ftw.testbrowser.response.PageResponse`
+        """
+        status_code, status_reason, _ = response
+        return klass(url,
+                     final_url=driver.get_url(),
+                     status_code=status_code,
+                     status_reason=status_reason,
+                     headers=driver.get_response_headers(),
+                     body=driver.get_response_body())
+
+    def __repr__(self):
+        if self.error is not None:
+            return '<PageResponse {0} {1!r}>'.format(self.url, self.error)
+        return '<PageResponse {0} {1} {2}>'.format(
+            self.url, self.status_code, self.status_reason)
+
+    @property
+    def ok(self):
+        """``True`` when the page was fetched without error and the status
+        code is not a client or server error.
+        """
+        return self.error is None and self.status_code < 400
+
+    @property
+    def encoding(self):
+        """The encoding of the response, e.g. ``utf-8``.
+        """
+        content_type = self.headers.get('Content-Type', '')
+        match = re.match(r'[^;]*; ?charset="?([^"]*)"?', content_type)
+        if match:
+            return match.group(1)
+
+    @property
+    def contents(self):
+        """The response body as native string.
+        """
+        if six.PY3 and isinstance(self.body, bytes):
+            return self.body.decode(self.encoding or 'utf8')
+        return self.body
+
+    @property
+    def json(self):
+        """The response body converted from JSON.
+        """
+        return json.loads(self.contents)
+
+    @property
+    def document(self):
+        """The lxml document of the response, which is parsed on first
+        access, or ``None`` when the response has no body.
+        """
+        if self._document is None and self.body:
+            self._document = lxml.html.parse(
+                BytesIO(self.body),
+                TestbrowserHTMLParser(encoding=self.encoding))
+        return self._document
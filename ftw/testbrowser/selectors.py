@@ -0,0 +1,102 @@
+from cssselect.xpath import HTMLTranslator
+from ftw.testbrowser.utils import LRUCache
+from lxml.cssselect import LxmlTranslator
+
+import lxml.etree
+
+
+#: Translation mode used by ``Browser.css``: the selector is translated the
+#: same way as ``lxml.cssselect.CSSSelector`` does.
+DOCUMENT_MODE = 'document'
+
+#: Translation mode used by ``NodeWrapper.css``: selectors may start with
+#: ``>`` for selecting direct children of the context node.
+NODE_MODE = 'node'
+
+#: Translation mode used by ``NodeWrapper.parent``: the expression has no
+#: axis prefix, so that it can be used with the ``ancestor::`` axis.
+ANCESTOR_MODE = 'ancestor'
+
+
+#: Process wide cache of CSS selectors translated to xpath expressions.
+#: The key is a tuple of the CSS selector and the translation mode.
+XPATH_TRANSLATION_CACHE = LRUCache(maxsize=1024)
+
+#: Process wide cache of compiled ``lxml.etree.XPath`` objects.
+#: The key is a tuple of the xpath expression and the namespace map.
+COMPILED_XPATH_CACHE = LRUCache(maxsize=1024)
+
+_lxml_translator = LxmlTranslator()
+_html_translator = HTMLTranslator()
+
+
+def css_to_xpath(css_selector, mode=DOCUMENT_MODE):
+    """Translates a CSS selector to an xpath expression.
+    The translations are cached in the ``XPATH_TRANSLATION_CACHE``.
+
+    :param css_selector: The CSS selector.
+    :type css_selector: string
+    :param mode: The translation mode (``DOCUMENT_MODE``, ``NODE_MODE``
+      or ``ANCESTOR_MODE``).
+    :type mode: string
+    :returns: The xpath expression.
+    :rtype: string
+    """
+    return XPATH_TRANSLATION_CACHE.get((css_selector, mode), _translate)
+
+
+def compile_xpath(expression, namespaces=None):
+    """Returns a compiled ``lxml.etree.XPath`` object for the expression.
+    The compiled objects are cached in the ``COMPILED_XPATH_CACHE``, so that
+    the same expression is only compiled once.
+    Values which differ per call should be passed as xpath variables
+    (e.g. ``//label[@for=$id]``) when calling the compiled object instead
+    of interpolating them into the expression.
+
+    :param expression: The xpath expression.
+    :type expression: string
+    :param namespaces: The namespace map (prefix to URI).
+    :type namespaces: dict
+    :returns: The compiled xpath.
+    :rtype: :py:class:`lxml.etree.XPath`
+    """
+    key = (expression, frozenset((namespaces or {}).items()))
+    return COMPILED_XPATH_CACHE.get(key, _compile)
+
+
+def _compile(key):
+    expression, namespaces = key
+    return lxml.etree.XPath(expression, namespaces=dict(namespaces))
+
+
+def _translate(key):
+    css_selector, mode = key
+
+    if mode == DOCUMENT_MODE:
+        return _lxml_translator.css_to_xpath(css_selector)
+
+    if mode == ANCESTOR_MODE:
+        return _html_translator.css_to_xpath(css_selector, prefix='')
+
+    if mode != NODE_MODE:
+        raise ValueError('Unknown translation mode {!r}.'.format(mode))
+
+    # When a direct child is selected (">x"), we need to prefix the xpath
+    # expression with "self::" rather than "descendant-or-self::" for not
+    # selecting the children of the children.
+    # "self::*/div"                 -->   ">div"
+    # "descendant-or-self::*/div"   -->   ">div, >* div"
+    # "descendant-or-self::div"     -->   "div"
+    xpath = []
+    for css in css_selector.split(','):
+        css = css.strip()
+        if css.startswith('>'):
+            # The translator does not allow leading '>', because it is not
+            # context sensitive.
+            xpath.append(_html_translator.css_to_xpath(
+                css[1:], prefix='self::*/'))
+        else:
+            xpath.append(_html_translator.css_to_xpath(
+                css, prefix='descendant-or-self::'))
+
+    return ' | '.join(xpath)
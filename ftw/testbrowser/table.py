@@ -1,13 +1,17 @@
+from collections import OrderedDict
 from ftw.testbrowser.nodes import Nodes
 from ftw.testbrowser.nodes import NodeWrapper
+from ftw.testbrowser.nodes import wrap_node
 from ftw.testbrowser.utils import normalize_spaces
-from functools import reduce
-from operator import attrgetter
+from itertools import islice
 from operator import itemgetter
 from six.moves import map
 from six.moves import zip
 
 
+CELL_TAGS = ('td', 'th')
+
+
 def colspan_padded_text(row):
     """Returns a list with the normalized_text of each cell of the ``row``,
     but adds empty padding-cells for cells with a colspan.
@@ -17,11 +21,249 @@ def colspan_padded_text(row):
     :returns: A list of cell texts
     :rtype: list
     """
-    def padded_text(cell):
+    texts = []
+    for cell in row.css('>td, >th'):
         colspan = int(cell.attrib.get('colspan', '1'))
-        return [cell.normalized_text()] * colspan
+        texts.extend([cell.normalized_text()] * colspan)
+    return texts
+
+
+def cell_text(cell):
+    """Returns the normalized text of an lxml cell node.
+    """
+    return normalize_spaces(cell.text_content())
+
+
+def rowspan(cell):
+    """Returns the number of rows an lxml cell node spans.
+    A ``rowspan`` of ``0`` spans all remaining rows of the row group.
+    """
+    try:
+        value = int(cell.attrib.get('rowspan', '1'))
+    except ValueError:
+        return 1
+    if value == 0:
+        return float('inf')
+    return max(value, 1)
+
+
+class TableGrid(object):
+    """The grid model of a table holds the rows of a table by section and
+    their cells, excluding nested tables. The normalized texts of the rows,
+    where cells with a colspan or rowspan are repeated, are computed on
+    first access.
+    The grid is built once per table and dropped when the document caches
+    of the browser are invalidated.
+    """
+
+    def __init__(self, table):
+        self.rows = []
+        self.head = []
+        self.body = []
+        self.foot = []
+        self.cells = {}
+        self.indexes = {}
+        self._texts = None
+
+        stack = [(child, False, False) for child in reversed(table)]
+        while stack:
+            node, in_head, in_foot = stack.pop()
+            tag = node.tag
+            if tag == 'table':
+                continue
+            elif tag == 'thead':
+                in_head = True
+            elif tag == 'tfoot':
+                in_foot = True
+            elif tag == 'tr':
+                self._add_row(node, in_head, in_foot)
+
+            stack.extend((child, in_head, in_foot)
+                         for child in reversed(node))
+
+    @classmethod
+    def of_table(klass, node, browser):
+        """Returns the grid of a table node.
+
+        :param node: The lxml table node.
+        :param browser: The browser instance.
+        :type browser: :py:class:`ftw.testbrowser.core.Browser`
+        :returns: The table grid.
+        :rtype: :py:class:`ftw.testbrowser.table.TableGrid`
+        """
+        grid = browser._table_grids.get(node, None)
+        if grid is None:
+            grid = browser._table_grids[node] = klass(node)
+        return grid
+
+    def _add_row(self, row, in_head, in_foot):
+        self.rows.append(row)
+        self.cells[row] = [node for node in row if node.tag in CELL_TAGS]
+        if in_head:
+            self.head.append(row)
+        if in_foot:
+            self.foot.append(row)
+        if not in_head and not in_foot:
+            self.body.append(row)
+
+    def get_rows(self, head=False, body=False, foot=False, head_offset=0):
+        """Returns the lxml nodes of the selected row sections.
+        """
+        rows = []
+        if head:
+            rows.extend(self.head[head_offset:])
+        if body:
+            rows.extend(self.body)
+        if foot:
+            rows.extend(self.foot)
+        return rows
+
+    def iter_cells(self):
+        """Yields the lxml cell nodes of all rows.
+        """
+        for row in self.rows:
+            for cell in self.cells[row]:
+                yield cell
+
+    def texts(self, row):
+        """Returns the normalized cell texts of a row, where cells spanning
+        multiple columns or rows are repeated.
+
+        :param row: The lxml row node.
+        :returns: A list of cell texts.
+        :rtype: list
+        """
+        if self._texts is None:
+            self._texts = dict(self._iter_texts(self.rows))
+        return self._texts[row]
+
+    def iter_texts(self, head=False, body=False, foot=False, head_offset=0):
+        """Yields the normalized cell texts of the selected rows.
+        Unless the texts of all rows were already computed, they are
+        computed row by row without being stored.
+
+        .. seealso:: :py:func:`ftw.testbrowser.table.TableGrid.texts`
+        """
+        if self._texts is not None:
+            for row in self.get_rows(head=head, body=body, foot=foot,
+                                     head_offset=head_offset):
+                yield self._texts[row]
+            return
+
+        sections = []
+        if head:
+            sections.append((self.head, head_offset))
+        if body:
+            sections.append((self.body, 0))
+        if foot:
+            sections.append((self.foot, 0))
+
+        for rows, offset in sections:
+            # Skipped rows are still computed for their spanning cells.
+            for _, texts in islice(self._iter_texts(rows), offset, None):
+                yield texts
+
+    def _iter_texts(self, rows):
+        group = None
+        spanning = {}
+        for row in rows:
+            if row.getparent() is not group:
+                # Cells do not span beyond their row group.
+                group = row.getparent()
+                spanning = {}
+
+            texts = []
+            continued = {}
+            cells = iter(self.cells[row])
+            cell = next(cells, None)
+            while cell is not None or spanning:
+                column = len(texts)
+                if column in spanning:
+                    text, remaining = spanning.pop(column)
+                    texts.append(text)
+                    if remaining > 1:
+                        continued[column] = (text, remaining - 1)
+                    continue
+
+                if cell is None:
+                    # Only cells spanning from previous rows are left.
+                    texts.append('')
+                    continue
+
+                text = cell_text(cell)
+                rows = rowspan(cell)
+                for _ in range(int(cell.attrib.get('colspan', '1'))):
+                    # A cell overlapping a spanning cell replaces it.
+                    spanning.pop(len(texts), None)
+                    if rows > 1:
+                        continued[len(texts)] = (text, rows - 1)
+                    texts.append(text)
+                cell = next(cells, None)
+
+            spanning = continued
+            yield row, texts
+
+
+class TableIndex(object):
+    """The table index maps the normalized texts of a column to the rows
+    containing the text in this column.
+    A text contained in multiple rows is a duplicate; looking it up raises
+    a ``ValueError`` instead of returning one of the rows.
+    """
+
+    def __init__(self, column, rows_by_text, browser):
+        self.column = column
+        self.browser = browser
+        self._rows = rows_by_text
+
+    def __getitem__(self, text):
+        rows = self._rows[text]
+        if len(rows) > 1:
+            raise ValueError(
+                'More than one row with "{0}" in column "{1}" found.'.format(
+                    text, self.column))
+        return wrap_node(rows[0], self.browser)
+
+    def __contains__(self, text):
+        return text in self._rows
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def get(self, text, default=None):
+        """Returns the row containing ``text`` or ``default``.
+        Raises a ``ValueError`` when the text is a duplicate.
+        """
+        if text not in self._rows:
+            return default
+        return self[text]
+
+    def keys(self):
+        """Returns the indexed texts in the order of the rows.
+        """
+        return list(self._rows)
+
+    def rows(self, text):
+        """Returns all rows containing ``text`` in the indexed column.
+
+        :param text: The normalized cell text.
+        :type text: string
+        :returns: The rows, which may be empty.
+        :rtype: :py:class:`ftw.testbrowser.nodes.Nodes`
+        """
+        return Nodes.lazy(self._rows.get(text, ()), self.browser)
+
+    @property
+    def duplicates(self):
+        """The texts contained in more than one row.
 
-    return reduce(list.__add__, map(padded_text, row.css('>td, >th')))
+        :returns: A list of texts.
+        :rtype: list
+        """
+        return [text for text, rows in self._rows.items() if len(rows) > 1]
 
 
 class Table(NodeWrapper):
@@ -40,9 +282,9 @@ class Table(NodeWrapper):
         :rtype: :py:class:`ftw.testbrowser.nodes.NodeWrapper`
         """
         text = normalize_spaces(text)
-        for cell in self.cells:
-            if cell.normalized_text() == text:
-                return cell
+        for cell in self.grid.iter_cells():
+            if cell_text(cell) == text:
+                return wrap_node(cell, self.browser)
 
         return super(Table, self).find(text)
 
@@ -66,12 +308,14 @@ class Table(NodeWrapper):
         :returns: A list of lists of texts.
         :rtype: list
         """
-        rows = self.get_rows(head=head, body=body, foot=foot,
+        grid = self.grid
+        rows = grid.get_rows(head=head, body=body, foot=foot,
                              head_offset=head_offset)
         if as_text:
-            return list(map(colspan_padded_text, rows))
+            return [list(grid.texts(row)) for row in rows]
         else:
-            return list(map(attrgetter('cells'), rows))
+            return [Nodes.lazy(grid.cells[row], self.browser)
+                    for row in rows]
 
     def dicts(self, body=True, foot=True,
               head_offset=0, as_text=True):
@@ -92,9 +336,8 @@ class Table(NodeWrapper):
         :rtype: list
         """
 
-        titles = self.get_titles(head_offset=head_offset)
-        rows = self.lists(head=False, body=body, foot=foot, as_text=as_text)
-        return [dict(zip(titles, values)) for values in rows]
+        return list(self.iter_dicts(body=body, foot=foot,
+                                    head_offset=head_offset, as_text=as_text))
 
     def column(self, index_or_titles, head=True, body=True, foot=True,
                head_offset=0, as_text=True):
@@ -117,19 +360,156 @@ class Table(NodeWrapper):
         :returns: A list of lists of texts.
         :rtype: list
         """
-        if isinstance(index_or_titles, int):
-            index = index_or_titles
+        return list(self.iter_column(
+            index_or_titles, head=head, body=body, foot=foot,
+            head_offset=head_offset, as_text=as_text))
+
+    def iter_lists(self, head=True, body=True, foot=True,
+                   head_offset=0, as_text=True):
+        """Yields a list per row, containing the texts of the cells.
+        The rows are computed one by one, so that scanning a big table
+        can be stopped early.
+
+        .. seealso:: :py:func:`ftw.testbrowser.table.Table.lists`
+
+        :param head: Include head rows.
+        :type head: boolean (Default: ``True``)
+        :param body: Include body rows.
+        :type body: boolean (Default: ``True``)
+        :param foot: Include foot rows.
+        :type foot: boolean (Default: ``True``)
+        :param head_offset: Offset for the header for removing header rows.
+        :type head_offset: int (Default: ``0``)
+        :param as_text: Converts cell values to text.
+        :type as_text: Boolean (Default: ``True``)
+        :returns: A generator of lists of texts.
+        :rtype: generator
+        """
+        grid = self.grid
+        if as_text:
+            for texts in grid.iter_texts(head=head, body=body, foot=foot,
+                                         head_offset=head_offset):
+                yield list(texts)
         else:
-            titles = self.get_titles(head_offset=head_offset)
-            try:
-                index = titles.index(index_or_titles)
-            except ValueError:
-                raise ValueError('Title "{0}" not in titles {1}'.format(
-                    index_or_titles, titles))
+            for row in grid.get_rows(head=head, body=body, foot=foot,
+                                     head_offset=head_offset):
+                yield Nodes.lazy(grid.cells[row], self.browser)
+
+    def iter_dicts(self, body=True, foot=True,
+                   head_offset=0, as_text=True):
+        """Yields a dict per row (of either table body or table foot).
+        The keys of the row dicts are the table headings and the values
+        are the cell texts.
+
+        .. seealso:: :py:func:`ftw.testbrowser.table.Table.dicts`
+
+        :param body: Include body rows.
+        :type body: boolean (Default: ``True``)
+        :param foot: Include foot rows.
+        :type foot: boolean (Default: ``True``)
+        :param head_offset: Offset for the header for removing header rows.
+        :type head_offset: int (Default: ``0``)
+        :param as_text: Converts cell values to text.
+        :type as_text: Boolean (Default: ``True``)
+        :returns: A generator of dicts.
+        :rtype: generator
+        """
+        titles = self.get_titles(head_offset=head_offset)
+        for values in self.iter_lists(head=False, body=body, foot=foot,
+                                      as_text=as_text):
+            yield dict(zip(titles, values))
+
+    def iter_column(self, index_or_titles, head=True, body=True, foot=True,
+                    head_offset=0, as_text=True):
+        """Yields the values of a specific column row by row.
+        The column may be identified by its index (integer)
+        or by the title (string).
+
+        .. seealso:: :py:func:`ftw.testbrowser.table.Table.column`
+
+        :param index_or_titles: Index or title of column
+        :type index_or_titles: int or string or list of strings
+        :param head: Include head rows.
+        :type head: boolean (Default: ``True``)
+        :param body: Include body rows.
+        :type body: boolean (Default: ``True``)
+        :param foot: Include foot rows.
+        :type foot: boolean (Default: ``True``)
+        :param head_offset: Offset for the header for removing header rows.
+        :type head_offset: int (Default: ``0``)
+        :param as_text: Converts cell values to text.
+        :type as_text: Boolean (Default: ``True``)
+        :returns: A generator of texts.
+        :rtype: generator
+        """
+        index = self._column_index(index_or_titles, head_offset)
+        grid = self.grid
+        if as_text:
+            rows = grid.iter_texts(head=head, body=body, foot=foot,
+                                   head_offset=head_offset)
+            return map(itemgetter(index), rows)
+
+        return (wrap_node(grid.cells[row][index], self.browser)
+                for row in grid.get_rows(head=head, body=body, foot=foot,
+                                         head_offset=head_offset))
+
+    def index_by(self, index_or_titles, body=True, foot=True,
+                 head_offset=0):
+        """Returns an index mapping the normalized texts of a column to the
+        rows of the table. The index is built once per table and column.
+        The column may be identified by its index (integer)
+        or by the title (string).
+
+        Example:
+
+        .. code:: py
+
+            table.index_by('Product')['Socks'].dict()
+
+        :param index_or_titles: Index or title of column
+        :type index_or_titles: int or string or list of strings
+        :param body: Include body rows.
+        :type body: boolean (Default: ``True``)
+        :param foot: Include foot rows.
+        :type foot: boolean (Default: ``True``)
+        :param head_offset: Offset for the header for removing header rows.
+        :type head_offset: int (Default: ``0``)
+        :returns: The index of the column.
+        :rtype: :py:class:`ftw.testbrowser.table.TableIndex`
+        """
+        index = self._column_index(index_or_titles, head_offset)
+        grid = self.grid
+        key = (index, body, foot)
+        rows_by_text = grid.indexes.get(key, None)
+        if rows_by_text is None:
+            rows_by_text = grid.indexes[key] = OrderedDict()
+            rows = grid.get_rows(body=body, foot=foot)
+            texts = grid.iter_texts(body=body, foot=foot)
+            for row, row_texts in zip(rows, texts):
+                if index < len(row_texts):
+                    rows_by_text.setdefault(row_texts[index], []).append(row)
+
+        return TableIndex(index_or_titles, rows_by_text, self.browser)
+
+    def _column_index(self, index_or_titles, head_offset):
+        if isinstance(index_or_titles, int):
+            return index_or_titles
+
+        titles = self.get_titles(head_offset=head_offset)
+        try:
+            return titles.index(index_or_titles)
+        except ValueError:
+            raise ValueError('Title "{0}" not in titles {1}'.format(
+                index_or_titles, titles))
+
+    @property
+    def grid(self):
+        """The grid model of this table, which is built once per document.
 
-        return list(map(itemgetter(index), self.lists(
-            head=head, body=body, foot=foot, head_offset=head_offset,
-            as_text=as_text)))
+        :returns: The table grid.
+        :rtype: :py:class:`ftw.testbrowser.table.TableGrid`
+        """
+        return TableGrid.of_table(self.node, self.browser)
 
     @property
     def titles(self):
@@ -152,8 +532,8 @@ class Table(NodeWrapper):
         :returns: A list of table head texts per column.
         :rtype: list
         """
-        texts_per_rows = list(
-            map(colspan_padded_text, self.head_rows[head_offset:]))
+        texts_per_rows = self.grid.iter_texts(
+            head=True, head_offset=head_offset)
         texts_per_columns = zip(*texts_per_rows)
         return list(map('\n'.join, texts_per_columns))
 
@@ -165,7 +545,7 @@ class Table(NodeWrapper):
         :returns: A list of heading rows.
         :rtype: :py:class:`ftw.testbrowser.nodes.Nodes`
         """
-        return self.filter_unfamiliars(self.css('thead tr'))
+        return Nodes.lazy(self.grid.head, self.browser)
 
     @property
     def foot_rows(self):
@@ -175,7 +555,7 @@ class Table(NodeWrapper):
         :returns: A list of footer rows.
         :rtype: :py:class:`ftw.testbrowser.nodes.Nodes`
         """
-        return self.filter_unfamiliars(self.css('tfoot tr'))
+        return Nodes.lazy(self.grid.foot, self.browser)
 
     @property
     def body_rows(self):
@@ -189,8 +569,7 @@ class Table(NodeWrapper):
         :returns: A list of body rows which are part of this table.
         :rtype: :py:class:`ftw.testbrowser.nodes.Nodes`
         """
-        exclude_rows = self.head_rows + self.foot_rows
-        return Nodes([node for node in self.rows if node not in exclude_rows])
+        return Nodes.lazy(self.grid.body, self.browser)
 
     @property
     def rows(self):
@@ -199,7 +578,7 @@ class Table(NodeWrapper):
         :returns: A list of rows which are part of this table.
         :rtype: :py:class:`ftw.testbrowser.nodes.Nodes`
         """
-        return self.filter_unfamiliars(self.css('tr'))
+        return Nodes.lazy(self.grid.rows, self.browser)
 
     def get_rows(self, head=False, body=False, foot=False, head_offset=0):
         """Returns merged head, body or foot rows.
@@ -216,14 +595,10 @@ class Table(NodeWrapper):
         :returns: A list of rows which are part of this table.
         :rtype: :py:class:`ftw.testbrowser.nodes.Nodes`
         """
-        rows = Nodes()
-        if head:
-            rows.extend(self.head_rows[head_offset:])
-        if body:
-            rows.extend(self.body_rows)
-        if foot:
-            rows.extend(self.foot_rows)
-        return rows
+        return Nodes.lazy(
+            self.grid.get_rows(head=head, body=body, foot=foot,
+                               head_offset=head_offset),
+            self.browser)
 
     @property
     def cells(self):
@@ -232,10 +607,7 @@ class Table(NodeWrapper):
         :returns: A list of cells which are part of this table.
         :rtype: :py:class:`ftw.testbrowser.nodes.Nodes`
         """
-        cells = Nodes()
-        for row in self.rows:
-            cells.extend(row.cells)
-        return cells
+        return Nodes.lazy(self.grid.iter_cells(), self.browser)
 
     def filter_unfamiliars(self, nodes):
         """Returns all nodes from the ``nodes`` list which are part of this
@@ -275,9 +647,11 @@ class TableComponent(NodeWrapper):
         :returns: the table node
         :rtype: :py:class:`ftw.testbrowser.table.Table`
         """
-        for node in self.iterancestors():
-            if node.tag == 'table':
-                return node
+        return self._first_ancestor('table')
+
+    def _first_ancestor(self, tag):
+        for node in self.node.iterancestors(tag):
+            return wrap_node(node, self.browser)
         return None
 
 
@@ -302,7 +676,8 @@ class TableRow(TableComponent):
         :returns: A dict with the cell texts.
         :rtype: dict
         """
-        return dict(zip(self.table.titles, colspan_padded_text(self)))
+        table = self.table
+        return dict(zip(table.titles, table.grid.texts(self.node)))
 
 
 class TableCell(TableComponent):
@@ -316,7 +691,4 @@ class TableCell(TableComponent):
         :returns: The row node.
         :rtype: :py:class:`ftw.testbrowser.table.TableRow`
         """
-        for node in self.iterancestors():
-            if node.tag == 'tr':
-                return node
-        return None
+        return self._first_ancestor('tr')
@@ -0,0 +1,93 @@
+from ftw.testbrowser.interfaces import IDriver
+from ftw.testbrowser.pages import plone
+from ftw.testbrowser.testing import REQUESTS_TESTING
+from ftw.testbrowser.tests import BrowserTestCase
+from plone.app.testing import TEST_USER_ID
+from plone.app.testing import TEST_USER_NAME
+from plone.app.testing import TEST_USER_PASSWORD
+from unittest import skipIf
+from zope.interface.verify import verifyClass
+
+import os
+import shutil
+import six
+import tempfile
+
+
+if six.PY3:
+    from ftw.testbrowser.asyncbrowser import AsyncBrowser
+    from ftw.testbrowser.drivers.asyncdriver import AsyncDriver
+
+    import asyncio
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+@skipIf(six.PY2, 'The async browser requires Python 3')
+class TestAsyncBrowser(BrowserTestCase):
+    layer = REQUESTS_TESTING
+
+    def test_implements_interface(self):
+        verifyClass(IDriver, AsyncDriver)
+
+    def test_submit_form(self):
+        with AsyncBrowser() as browser:
+            run(browser.open(view='test-form'))
+            browser.fill({'Text field': 'Hello'})
+            run(browser.find('Submit').click())
+            self.assertEqual({'textfield': 'Hello',
+                              'submit-button': 'Submit'}, browser.json)
+
+    def test_cookies_are_kept_in_the_session(self):
+        with AsyncBrowser() as browser:
+            run(browser.open(view='login_form'))
+            browser.fill({'Login Name': TEST_USER_NAME,
+                          'Password': TEST_USER_PASSWORD})
+            run(browser.find('Log in').click())
+            run(browser.open())
+            self.assertEqual(TEST_USER_ID, plone.logged_in(browser))
+
+    def test_browsers_run_concurrently(self):
+        portal_url = self.layer['portal'].absolute_url() + '/'
+
+        with AsyncBrowser() as first, AsyncBrowser() as second:
+            run(asyncio.gather(first.open(view='test-elements'),
+                               second.open(view='test-tables')))
+            self.assertEqual(portal_url + 'test-elements', first.url)
+            self.assertEqual(portal_url + 'test-tables', second.url)
+
+        with AsyncBrowser() as browser:
+            responses = run(browser.open_many(
+                [portal_url + 'test-tables', portal_url + 'not-existing']))
+            self.assertEqual([200, 404], [response.status_code
+                                          for response in responses])
+
+    def test_close_after_the_event_loop_is_closed(self):
+        with AsyncBrowser() as browser:
+            run(browser.open(view='test-elements'))
+            browser.close()
+            self.assertEqual({}, browser.get_driver().transport._idle)
+
+    def test_replaying_a_cassette(self):
+        tempdir = tempfile.mkdtemp()
+        path = os.path.join(tempdir, 'test.cassette')
+        url = self.layer['portal'].absolute_url() + '/test-tables'
+        try:
+            with AsyncBrowser() as browser:
+                with browser.recording(path):
+                    run(browser.open(url))
+
+            with AsyncBrowser().replay(path) as browser:
+                run(browser.open(url))
+                self.assertEqual(['Foo'],
+                                 browser.css('#onecol-table th').text)
+                run(browser.reload())
+                self.assertEqual(url, browser.url)
+        finally:
+            shutil.rmtree(tempdir)
@@ -11,6 +11,7 @@ from ftw.testbrowser.tests import BrowserTestCase
 from ftw.testbrowser.tests import IS_PLONE_4
 from ftw.testbrowser.tests import PLONE_VERSION
 from ftw.testbrowser.tests.alldrivers import all_drivers
+from ftw.testbrowser.tests.helpers import asset
 from ftw.testbrowser.tests.helpers import capture_streams
 from ftw.testbrowser.tests.helpers import register_view
 from plone.app.testing import SITE_OWNER_NAME
@@ -21,8 +22,13 @@ from six import StringIO
 from zExceptions import BadRequest
 from zope.globalrequest import getRequest
 from zope.publisher.browser import BrowserView
+from ZPublisher.Iterators import filestream_iterator
 
+import mmap
+import os
+import shutil
 import six
+import tempfile
 
 
 HTTP_ONLY = 'HTTPOnly' if PLONE_VERSION < (5, 2, 0) else 'HttpOnly'
@@ -326,6 +332,118 @@ class TestBrowserCore(BrowserTestCase):
             subbrowser.login(SITE_OWNER_NAME).reload()
             self.assertEqual(SITE_OWNER_NAME, plone.logged_in(subbrowser))
 
+    @browsing
+    def test_open_many(self, browser):
+        browser.login().open(view='test-elements')
+        portal_url = self.layer['portal'].absolute_url() + '/'
+        responses = browser.open_many(
+            [portal_url + 'test-tables',
+             portal_url + 'not-existing',
+             portal_url + 'test-form-result'],
+            concurrency=2)
+
+        self.assertEqual([200, 404, 200],
+                         [response.status_code for response in responses])
+        self.assertEqual(
+            ['Foo'],
+            responses[0].document.xpath('//*[@id="onecol-table"]//th/text()'))
+        self.assertEqual({}, responses[2].json)
+        self.assertEqual(portal_url + 'test-elements', browser.url)
+
+    @browsing
+    def test_open_streamed(self, browser):
+        with asset('file.pdf') as pdf:
+            payload = pdf.read()
+            path = pdf.name
+
+        class Download(BrowserView):
+            def __call__(self):
+                self.request.response.setHeader(
+                    'Content-Type', 'application/pdf')
+                self.request.response.setHeader(
+                    'Content-Length', str(len(payload)))
+                return filestream_iterator(path, 'rb')
+
+        tempdir = tempfile.mkdtemp()
+        try:
+            with register_view(Download, 'download'):
+                browser.open(view='download', stream=True)
+                self.assertIsNone(browser.document)
+                chunks = list(browser.iter_body(1024))
+                self.assertEqual(payload, b''.join(chunks))
+                self.assertLessEqual(max(map(len, chunks)), 1024)
+
+                browser.open(view='download', stream=True)
+                target = browser.save_body(os.path.join(tempdir, 'file.pdf'))
+                with open(target, 'rb') as file_:
+                    self.assertEqual(payload, file_.read())
+        finally:
+            shutil.rmtree(tempdir)
+
+    @browsing
+    def test_spilled_bodies_are_memory_mapped(self, browser):
+        browser.spill_threshold = 1024
+        try:
+            browser.open(view='test-tables')
+            self.assertIsInstance(browser.body, mmap.mmap)
+            self.assertIn(u'Foo', browser.contents)
+            self.assertEqual(
+                ['Foo'], browser.css('#onecol-table th').text)
+
+            browser.open(view='test-form-result', data={'foo': 'bar'})
+            self.assertEqual({u'foo': u'bar'}, browser.json)
+        finally:
+            browser.spill_threshold = None
+
+    @browsing
+    def test_lazy_parsing_defers_parsing_until_document_is_accessed(self, browser):
+        browser.lazy_parsing = True
+        try:
+            browser.open(view='test-elements')
+            self.assertIsNone(browser._document)
+            self.assertEqual('A link', browser.find('A link').text)
+            self.assertIsNotNone(browser._document)
+        finally:
+            browser.lazy_parsing = False
+
+    @browsing
+    def test_lazy_parsing_does_not_parse_json_responses(self, browser):
+        browser.lazy_parsing = True
+        try:
+            browser.open(view='test-form-result')
+            self.assertEqual({}, browser.json)
+            self.assertIsNone(browser._document)
+        finally:
+            browser.lazy_parsing = False
+
+    @browsing
+    def test_lazy_parsing_forgets_unparsed_document_of_previous_page(self, browser):
+        browser.lazy_parsing = True
+        try:
+            browser.open(view='test-elements')
+            browser.open_html('<html><body><h1>Static</h1></body></html>')
+            self.assertEqual(['Static'], browser.css('h1').text)
+        finally:
+            browser.lazy_parsing = False
+
+    @browsing
+    def test_indexed_queries_match_xpath_queries(self, browser):
+        browser.open(view='test-elements')
+        selectors = ('form', '#textfield', 'input[name="box"]', 'a', 'label')
+        expected = [browser.css(selector) for selector in selectors]
+        form = browser.css('form').first
+        expected_in_form = [form.css(selector) for selector in selectors]
+
+        browser.indexed_queries = True
+        try:
+            self.assertEqual(expected,
+                             [browser.css(selector) for selector in selectors])
+            self.assertEqual(expected_in_form,
+                             [form.css(selector) for selector in selectors])
+            self.assertIsNotNone(browser.element_index)
+        finally:
+            browser.indexed_queries = False
+
     @browsing
     def test_opening_preserves_global_request(self, browser):
         browser.open()
@@ -0,0 +1,112 @@
+from ftw.testbrowser import Browser
+from ftw.testbrowser import browsing
+from ftw.testbrowser.cassette import Cassette
+from ftw.testbrowser.drivers.replaydriver import ReplayDriver
+from ftw.testbrowser.exceptions import RequestNotRecorded
+from ftw.testbrowser.interfaces import IDriver
+from ftw.testbrowser.tests import BrowserTestCase
+from ftw.testbrowser.tests.alldrivers import all_drivers
+from requests_toolbelt import MultipartEncoder
+from unittest import TestCase
+from zope.interface.verify import verifyClass
+
+import os
+import shutil
+import tempfile
+
+
+class TestReplayDriverImplementation(TestCase):
+
+    def test_implements_interface(self):
+        verifyClass(IDriver, ReplayDriver)
+
+
+class TestCassette(TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tempdir, 'test.cassette')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_fingerprint_ignores_order_of_form_data(self):
+        self.assertEqual(
+            Cassette.fingerprint('POST', 'http://nohost/', {'a': '1',
+                                                           'b': '2'}),
+            Cassette.fingerprint('post', 'http://nohost/', [('b', '2'),
+                                                            ('a', '1')]))
+        self.assertNotEqual(
+            Cassette.fingerprint('POST', 'http://nohost/', {'a': '1'}),
+            Cassette.fingerprint('POST', 'http://nohost/', {'a': '2'}))
+
+    def test_fingerprint_ignores_multipart_boundary(self):
+        def fingerprint():
+            encoder = MultipartEncoder(fields=[('title', 'Hello')])
+            return Cassette.fingerprint(
+                'POST', 'http://nohost/', encoder.to_string(),
+                headers={'Content-Type': encoder.content_type})
+
+        self.assertEqual(fingerprint(), fingerprint())
+
+    def test_responses_are_replayed_in_recorded_order(self):
+        cassette = Cassette(self.path)
+        fingerprint = cassette.fingerprint('GET', 'http://nohost/')
+        for body in (b'first', b'second'):
+            cassette._add({'fingerprint': fingerprint,
+                           'method': 'GET',
+                           'url': 'http://nohost/',
+                           'status_code': 200,
+                           'status_reason': 'OK',
+                           'final_url': 'http://nohost/',
+                           'headers': [('Content-Type', 'text/plain')],
+                           'cookies': {},
+                           'body': body})
+        cassette.save()
+
+        cassette = Cassette.load(self.path)
+        self.assertEqual(
+            [b'first', b'second', b'second'],
+            [cassette.play('GET', 'http://nohost/')['body']
+             for _ in range(3)])
+
+        with self.assertRaises(RequestNotRecorded):
+            cassette.play('GET', 'http://nohost/foo')
+
+
+@all_drivers
+class TestRecordingAndReplaying(BrowserTestCase):
+
+    def setUp(self):
+        super(TestRecordingAndReplaying, self).setUp()
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tempdir, 'test.cassette')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    @browsing
+    def test_recorded_responses_are_replayed(self, browser):
+        with browser.recording(self.path):
+            browser.open(view='test-tables')
+            browser.open(view='test-form')
+            browser.fill({'Text field': 'Hello'}).submit()
+            with browser.expect_http_error(404):
+                browser.open(view='not-existing')
+
+        tables_url = self.portal.absolute_url() + '/test-tables'
+        with Browser().replay(self.path) as replaying:
+            replaying.open(tables_url)
+            self.assertEqual(tables_url, replaying.url)
+            self.assertEqual(['Foo'], replaying.css('#onecol-table th').text)
+
+            replaying.open(self.portal.absolute_url() + '/test-form')
+            replaying.fill({'Text field': 'Hello'}).submit()
+            self.assertEqual({'textfield': 'Hello',
+                              'submit-button': 'Submit'}, replaying.json)
+
+            with replaying.expect_http_error(404):
+                replaying.open(self.portal.absolute_url() + '/not-existing')
+
+            with self.assertRaises(RequestNotRecorded):
+                replaying.open(self.portal.absolute_url() + '/test-elements')
@@ -24,3 +24,58 @@ class TestRequestsDriverImplementation(BrowserTestCase):
             'There is already a header "Authorization" and the requests driver'
             ' does not support using the same header multiple times.',
             str(cm.exception))
+
+    @browsing
+    def test_reset_keeps_connection_pool(self, browser):
+        driver = browser.get_driver()
+        adapter = driver.requests_session.get_adapter('http://localhost/')
+        driver.requests_session.cookies.set('foo', 'bar')
+        browser.append_request_header('X-Foo', 'bar')
+
+        driver.reset()
+        self.assertIs(adapter,
+                      driver.requests_session.get_adapter('http://localhost/'))
+        self.assertEqual({}, driver.get_response_cookies())
+        self.assertNotIn('X-Foo', driver.requests_session.headers)
+
+    @browsing
+    def test_cloned_browsers_share_the_connection_pool(self, browser):
+        adapter = browser.get_driver().adapter
+        with browser.clone() as subbrowser:
+            subdriver = subbrowser.get_driver()
+            self.assertIs(adapter, subdriver.adapter)
+            self.assertIs(adapter, subdriver.requests_session.get_adapter(
+                'http://localhost/'))
+
+    def test_closing_the_pool_creates_a_new_one(self):
+        adapter = RequestsDriver.get_adapter()
+        RequestsDriver.close_pool()
+        self.assertEqual(0, len(adapter.poolmanager.pools))
+        self.assertIsNot(adapter, RequestsDriver.get_adapter())
+
+    @browsing
+    def test_open_many_collects_errors(self, browser):
+        browser.open()
+        responses = browser.open_many(['http://localhost:1/', browser.url])
+
+        self.assertIsNotNone(responses[0].error)
+        self.assertFalse(responses[0].ok)
+        self.assertIsNone(responses[1].error)
+        self.assertEqual(200, responses[1].status_code)
+
+    @browsing
+    def test_open_many_collects_errors_of_reading_the_response(self, browser):
+        browser.open()
+
+        def get_response_headers(driver):
+            raise ValueError('Broken headers.')
+
+        original = RequestsDriver.get_response_headers
+        RequestsDriver.get_response_headers = get_response_headers
+        try:
+            responses = browser.open_many([browser.url, browser.url])
+        finally:
+            RequestsDriver.get_response_headers = original
+
+        self.assertEqual(['Broken headers.', 'Broken headers.'],
+                         [str(response.error) for response in responses])
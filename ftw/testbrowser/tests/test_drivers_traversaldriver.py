@@ -4,12 +4,18 @@ from ftw.testbrowser.interfaces import IDriver
 from ftw.testbrowser.testing import TRAVERSAL_TESTING
 from ftw.testbrowser.tests import BrowserTestCase
 from ftw.testbrowser.tests import IS_PLONE_4
+from ftw.testbrowser.tests.helpers import register_view
 from plone.app.testing import SITE_OWNER_NAME
+from plone.app.testing import TEST_USER_NAME
+from plone.app.testing import TEST_USER_PASSWORD
 from plone.registry.interfaces import IRegistry
 from unittest import skipIf
 from zope.component import getUtility
 from zope.interface.verify import verifyClass
+from zope.publisher.browser import BrowserView
 
+import gzip
+import six
 import transaction
 
 
@@ -53,3 +59,42 @@ class TestTraversalDriverImplementation(BrowserTestCase):
         self.assertEqual(
             ['Plone site'], browser.css('title').text,
             'The traversal driver should not commit the transaction.')
+
+    @browsing
+    def test_expired_cookies_are_removed(self, browser):
+        browser.open(view='login_form')
+        browser.fill({'Login Name': TEST_USER_NAME,
+                      'Password': TEST_USER_PASSWORD}).submit()
+        self.assertIn('__ac', browser.cookies)
+
+        browser.open(view='logout')
+        self.assertNotIn('__ac', browser.cookies)
+
+    @browsing
+    def test_posting_form_data(self, browser):
+        browser.open(view='test-form-result',
+                     data=[('textfield', u'Hall\xf6'),
+                           ('choices:list', 'a'),
+                           ('choices:list', 'b')])
+        self.assertEqual({u'textfield': u'Hall\xf6',
+                          u'choices': [u'a', u'b']}, browser.json)
+
+    @browsing
+    def test_spilled_gzip_responses_are_decompressed(self, browser):
+        class Compressed(BrowserView):
+            def __call__(self):
+                body = six.BytesIO()
+                with gzip.GzipFile(fileobj=body, mode='wb') as zipfile:
+                    zipfile.write(b'<html><body><p>Hello</p></body></html>')
+                self.request.response.setHeader('Content-Type', 'text/html')
+                self.request.response.setHeader('Content-Encoding', 'gzip')
+                return body.getvalue()
+
+        browser.spill_threshold = 10
+        try:
+            with register_view(Compressed, 'compressed'):
+                browser.open(view='compressed')
+                self.assertEqual(['Hello'], browser.css('p').text)
+                self.assertIsNone(browser.headers.get('content-encoding'))
+        finally:
+            browser.spill_threshold = None
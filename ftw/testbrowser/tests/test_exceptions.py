@@ -21,6 +21,12 @@ class TestBrowserExceptions(TestCase):
                          str(exceptions.FormFieldNotFound('field label',
                                                           ['foo', 'bar', 'baz'])))
 
+    def test_form_field_not_found_with_multiple_fields(self):
+        self.assertEqual('Could not find form fields: "foo", "bar".',
+                         str(exceptions.FormFieldNotFound(['foo', 'bar'])))
+        self.assertEqual('Could not find form field: "foo".',
+                         str(exceptions.FormFieldNotFound(['foo'])))
+
     def test_options_not_found(self):
         self.assertEqual(
             'Could not find options [\'missing\'] for field "field label".',
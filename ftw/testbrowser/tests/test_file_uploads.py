@@ -1,4 +1,5 @@
 from ftw.testbrowser import browsing
+from ftw.testbrowser import form
 from ftw.testbrowser.pages import factoriesmenu
 from ftw.testbrowser.pages import statusmessages
 from ftw.testbrowser.tests.alldrivers import all_drivers
@@ -78,6 +79,33 @@ class TestFileUploadsArchetypes(TestCase):
             self.assertTrue(pdf.read().strip() == browser.contents.strip(),
                             'The PDF was changed when uploaded!')
 
+    @browsing
+    def test_streamed_file_uploading(self, browser):
+        browser.login(SITE_OWNER_NAME).open()
+        factoriesmenu.add('File')
+
+        spool_size = form.MULTIPART_SPOOL_SIZE
+        form.MULTIPART_SPOOL_SIZE = 0
+        try:
+            with asset('file.pdf') as pdf:
+                browser.fill({'Title': 'The PDF',
+                              'File': pdf}).save()
+        finally:
+            form.MULTIPART_SPOOL_SIZE = spool_size
+
+        # Streaming drivers receive a spooled request body, which is closed
+        # with the next request.
+        upload_body = browser._upload_body
+        browser.find('file.pdf').click()
+        if browser.get_driver().STREAMING_UPLOADS:
+            self.assertTrue(upload_body.closed)
+        else:
+            self.assertIsNone(upload_body)
+        self.assertIsNone(browser._upload_body)
+        with asset('file.pdf') as pdf:
+            self.assertTrue(pdf.read().strip() == browser.contents.strip(),
+                            'The PDF was changed when uploaded!')
+
     @browsing
     def test_upload_unicode(self, browser):
         browser.login(SITE_OWNER_NAME).open()
@@ -35,6 +35,32 @@ class TestBrowserForms(BrowserTestCase):
                                          ' Fields: '),
             str(cm.exception))
 
+    @browsing
+    def test_exception_lists_all_fields_not_found(self, browser):
+        browser.open_html('<form id="form"><input name="title" /></form>')
+        with self.assertRaises(FormFieldNotFound) as cm:
+            browser.forms['form'].fill({'title': 'Foo',
+                                        'First Name': 'Hugo',
+                                        'Last Name': 'Boss'})
+        self.assertEqual(
+            'Could not find form fields: "First Name", "Last Name".'
+            ' Fields: "title"',
+            str(cm.exception))
+
+    @browsing
+    def test_fill_checkbox_of_group_by_label(self, browser):
+        browser.open_html('\n'.join((
+            '<form id="form">',
+            '<input type="checkbox" name="tags:list" value="a" id="a" />',
+            '<label for="a">Alpha</label>',
+            '<input type="checkbox" name="tags:list" value="b" id="b" />',
+            '<label for="b">Beta</label>',
+            '<input type="checkbox" name="other" checked="checked" />',
+            '</form>')))
+        form = browser.fill({'Beta': True})
+        self.assertEqual({'b'}, set(form.values['tags:list']))
+        self.assertEqual('on', form.values['other'])
+
     @browsing
     def test_exception_when_chaning_fields_in_different_forms(self, browser):
         browser.open(view='login_form')
@@ -66,6 +92,43 @@ class TestBrowserForms(BrowserTestCase):
         self.assertEqual(Form, type(form))
         self.assertEqual(lxml.html.FormElement, type(form.node))
 
+    @browsing
+    def test_forms_are_looked_up_once_per_document(self, browser):
+        browser.open_html('<form id="first"><input name="title" /></form>')
+        form = browser.forms['first']
+        self.assertIs(form, browser.forms['first'])
+        self.assertIs(form.field_index, browser.forms['first'].field_index)
+
+        browser.open_html('<form id="second"><input name="title" /></form>')
+        self.assertEqual(['second'], list(browser.forms))
+        self.assertIsNot(form.field_index,
+                         browser.forms['second'].field_index)
+
+    @browsing
+    def test_find_field_by_wrapping_label(self, browser):
+        browser.open_html('\n'.join((
+            '<form id="form">',
+            '<label><input type="checkbox" name="agree" /> I agree</label>',
+            '<label for="title">Title</label>',
+            '<label><input id="title" name="title" /> Wrapping</label>',
+            '</form>')))
+        form = browser.forms['form']
+        self.assertEqual('agree', form.find_field('I agree').name)
+        self.assertEqual('title', form.find_field('Title').name)
+        self.assertIsNone(form.find_field('Wrapping'))
+        self.assertEqual(['I agree', 'Title'], form.field_labels)
+
+    @browsing
+    def test_field_index_is_rebuilt_when_form_is_changed(self, browser):
+        browser.open_html('<form id="form"><input name="title" /></form>')
+        form = browser.forms['form']
+        self.assertIsNone(form.find_field('description'))
+
+        form.node.append(lxml.html.fragment_fromstring(
+            '<input name="description" />'))
+        browser.invalidate_document_caches()
+        self.assertEqual('description', form.find_field('description').name)
+
     @browsing
     def test_submit_form(self, browser):
         browser.open(view='login_form')
@@ -264,6 +327,32 @@ class TestSubmittingForms(BrowserTestCase):
         self.assertTrue(button)
         self.assertEqual('submit', button.type)
 
+    @browsing
+    def test_inputs_are_scoped_to_the_form(self, browser):
+        browser.open_html('\n'.join((
+            '<form id="first">',
+            ' <input name="title" />',
+            ' <button type="submit" name="save">Save</button>',
+            ' <button type="submit" name="foreign" form="second">X</button>',
+            '</form>',
+            '<form id="second"><input name="text" /></form>',
+            '<button type="submit" name="cancel" form="second">',
+            ' Cancel</button>',
+            '<button type="submit" name="lonely">Lonely</button>')))
+
+        self.assertEqual(['title', 'save'],
+                         [node.name for node in browser.forms['first'].inputs])
+        self.assertEqual(
+            ['text', 'foreign', 'cancel'],
+            [node.name for node in browser.forms['second'].inputs])
+
+        self.assertIsNone(browser.forms['first'].find_button_by_label('X'))
+        button = browser.forms['second'].find_button_by_label('Cancel')
+        self.assertEqual(browser.forms['second'], button.form)
+        self.assertEqual(['foreign', 'cancel'],
+                         [node.name for node in
+                          browser.forms['second'].find_submit_buttons()])
+
     @browsing
     def test_find_submit_button_tag_click(self, browser):
         browser.open()
@@ -416,3 +505,30 @@ class TestSelectField(BrowserTestCase):
             '</form>')
         form = browser.fill({'text': 'some text'})
         self.assertEqual({'text': 'some text'}, dict(form.values))
+
+    @browsing
+    def test_textarea_label_with_dashed_for_attribute(self, browser):
+        """Regression: TinyMCE labels reference the textarea id with dashes
+        instead of dots and used to be ignored by the field index.
+        """
+        browser.open_html(
+            '<form>'
+            ' <label for="form-widgets-text">Text</label>'
+            ' <textarea id="form.widgets.text" name="form.widgets.text">'
+            '</textarea>'
+            '</form>')
+        self.assertEqual('form.widgets.text', browser.find('Text').name)
+        form = browser.fill({'Text': 'some text'})
+        self.assertEqual({'form.widgets.text': 'some text'},
+                         dict(form.values))
+
+    @browsing
+    def test_wrapping_textareas_keeps_other_wrappers(self, browser):
+        browser.open_html(
+            '<form>'
+            ' <label for="form-widgets-text">Text</label>'
+            ' <textarea name="form.widgets.text"></textarea>'
+            '</form>')
+        form = browser.css('form').first
+        self.assertEqual('form.widgets.text', browser.find('Text').name)
+        self.assertIs(form, browser.css('form').first)
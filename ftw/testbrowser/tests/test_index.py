@@ -0,0 +1,97 @@
+from ftw.testbrowser.index import ElementIndex
+from ftw.testbrowser.index import parse_simple_selector
+from ftw.testbrowser.index import SimpleSelector
+from ftw.testbrowser.selectors import DOCUMENT_MODE
+from ftw.testbrowser.selectors import NODE_MODE
+from unittest import TestCase
+
+import lxml.html
+
+
+HTML = '''
+<html>
+  <body>
+    <div id="content" class="main  portal">
+      <form id="login" name="login">
+        <input name="title" class="text" />
+        <input name="description" class="text" />
+      </form>
+      <dl class="portalMessage info"><dt>Info</dt></dl>
+    </div>
+    <div id="footer" class="portal"><a class="link">Footer</a></div>
+  </body>
+</html>
+'''
+
+
+class TestParseSimpleSelector(TestCase):
+
+    def test_parses_simple_selectors(self):
+        self.assertEqual(SimpleSelector('input', None, ('text',), 'title'),
+                         parse_simple_selector('input.text[name="title"]',
+                                               DOCUMENT_MODE))
+        self.assertEqual(SimpleSelector(None, 'content', (), None),
+                         parse_simple_selector('#content', DOCUMENT_MODE))
+        self.assertEqual(SimpleSelector(None, None, ('a', 'b'), None),
+                         parse_simple_selector('.a.b', DOCUMENT_MODE))
+
+    def test_tag_names_are_lowercased_in_node_mode(self):
+        self.assertEqual('div', parse_simple_selector('DIV', NODE_MODE).tag)
+        self.assertEqual('DIV', parse_simple_selector('DIV', DOCUMENT_MODE).tag)
+
+    def test_complex_selectors_are_not_simple(self):
+        for selector in ('div a', '>dt', 'a, p', '*', 'a:first-child',
+                         'input[type=text]', ''):
+            self.assertIsNone(parse_simple_selector(selector, DOCUMENT_MODE),
+                              selector)
+
+
+class TestElementIndex(TestCase):
+
+    def setUp(self):
+        self.root = lxml.html.fromstring(HTML)
+        self.index = ElementIndex(self.root)
+
+    def select(self, css, context=None):
+        if context is not None:
+            context = self.root.get_element_by_id(context)
+        return [node.get('id') or node.get('name') or node.tag
+                for node in self.index.select(css, context=context,
+                                              mode=NODE_MODE)]
+
+    def test_select_by_id_class_tag_and_name(self):
+        self.assertEqual(['content'], self.select('#content'))
+        self.assertEqual(['content', 'footer'], self.select('.portal'))
+        self.assertEqual(['content', 'footer'], self.select('div'))
+        self.assertEqual(['title'], self.select('input[name=title]'))
+        self.assertEqual(['dl'], self.select('dl.info.portalMessage'))
+
+    def test_select_within_context_includes_context(self):
+        self.assertEqual(['content'], self.select('div', context='content'))
+        self.assertEqual(['footer'], self.select('.portal', context='footer'))
+        self.assertEqual(['title', 'description'],
+                         self.select('.text', context='login'))
+        self.assertEqual([], self.select('a', context='content'))
+
+    def test_no_match(self):
+        self.assertEqual([], self.select('#missing'))
+        self.assertEqual([], self.select('.missing.portal'))
+
+    def test_complex_selectors_are_not_answered(self):
+        self.assertIsNone(self.index.select('div a'))
+
+    def test_unindexed_context_is_not_answered(self):
+        self.assertIsNone(self.index.select(
+            'a', context=lxml.html.fromstring('<div><a /></div>')))
+
+    def test_is_descendant(self):
+        content = self.root.get_element_by_id('content')
+        login = self.root.get_element_by_id('login')
+        title = self.root.cssselect('input[name=title]')[0]
+        footer = self.root.get_element_by_id('footer')
+
+        self.assertTrue(self.index.is_descendant(title, login))
+        self.assertTrue(self.index.is_descendant(title, content))
+        self.assertFalse(self.index.is_descendant(login, login))
+        self.assertFalse(self.index.is_descendant(login, title))
+        self.assertFalse(self.index.is_descendant(title, footer))
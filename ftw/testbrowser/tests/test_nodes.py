@@ -296,6 +296,33 @@ class TestNodesResultSet(BrowserTestCase):
             Nodes, type(result),
             'Reversing a "Nodes" object should not change it\'s type.')
 
+    @browsing
+    def test_nodes_are_wrapped_on_access(self, browser):
+        browser.open(view='test-structure')
+        result = browser.css('#some-links a')
+        self.assertEqual(3, len(result))
+        self.assertEqual(0, list.__len__(result))
+
+        self.assertEqual('First link', result.first.text)
+        self.assertIs(result.first, result[0])
+        self.assertEqual('Third link', result[-1].text)
+        self.assertEqual(0, list.__len__(result))
+
+        self.assertEqual(['First link', 'Second link', 'Third link'],
+                         [link.text for link in result])
+        self.assertEqual(3, list.__len__(result))
+        self.assertIs(result[0], list(result)[0])
+
+    @browsing
+    def test_lazy_result_sets_are_comparable(self, browser):
+        browser.open(view='test-structure')
+        self.assertEqual(browser.css('#some-links a'),
+                         browser.css('#some-links a'))
+        self.assertEqual(list(browser.css('#some-links a')),
+                         browser.css('#some-links a'))
+        self.assertEqual(browser.css('#some-links a')[1:],
+                         browser.css('#some-links a')[1:])
+
 
 @all_drivers
 class TestNodeWrappers(BrowserTestCase):
@@ -365,6 +392,39 @@ class TestNodeWrappers(BrowserTestCase):
         form = browser.css('#content form').first
         self.assertEqual(Form, type(form))
 
+    @browsing
+    def test_widgets_are_matched_on_field_divs_only(self, browser):
+        browser.open_html('\n'.join((
+            '<div class="field"><label>Title</label></div>',
+            '<div class="other"><label>Title</label></div>',
+            '<span class="field"><label>Title</label></span>')))
+        self.assertEqual(
+            ['PloneWidget', 'NodeWrapper', 'NodeWrapper'],
+            [type(node).__name__ for node in browser.css('.field, .other')])
+
+    @browsing
+    def test_widget_is_matched_again_after_invalidation(self, browser):
+        browser.open_html('<div class="field"><label>Title</label></div>')
+        self.assertEqual('PloneWidget',
+                         type(browser.css('div').first).__name__)
+
+        browser.css('div').first.node.attrib['class'] = 'other'
+        browser.invalidate_document_caches()
+        self.assertEqual('NodeWrapper',
+                         type(browser.css('div').first).__name__)
+
+    @browsing
+    def test_same_wrapper_is_returned_for_the_same_element(self, browser):
+        browser.open(view='test-structure')
+        content = browser.css('#content').first
+        self.assertIs(content, browser.css('#content').first)
+        self.assertIs(content,
+                      browser.css('#content a').first.parent('#content'))
+
+        browser.reload()
+        self.assertIsNot(content, browser.css('#content').first)
+        self.assertEqual(NodeWrapper, type(browser.css('#content').first))
+
     @browsing
     def test_getparent_returns_wrapped_node(self, browser):
         browser.open(view='test-structure')
@@ -0,0 +1,61 @@
+from ftw.testbrowser.selectors import ANCESTOR_MODE
+from ftw.testbrowser.selectors import compile_xpath
+from ftw.testbrowser.selectors import COMPILED_XPATH_CACHE
+from ftw.testbrowser.selectors import css_to_xpath
+from ftw.testbrowser.selectors import NODE_MODE
+from ftw.testbrowser.selectors import XPATH_TRANSLATION_CACHE
+from lxml.cssselect import CSSSelector
+from unittest import TestCase
+
+import lxml.html
+
+
+class TestCSSToXPath(TestCase):
+
+    def setUp(self):
+        XPATH_TRANSLATION_CACHE.clear()
+
+    def test_document_mode_translates_like_lxml_css_selector(self):
+        self.assertEqual(CSSSelector('#content .foo > a').path,
+                         css_to_xpath('#content .foo > a'))
+
+    def test_node_mode_supports_direct_children(self):
+        self.assertEqual(
+            "self::*/div | descendant-or-self::span",
+            css_to_xpath('>div, span', mode=NODE_MODE))
+
+    def test_ancestor_mode_has_no_prefix(self):
+        self.assertEqual("div", css_to_xpath('div', mode=ANCESTOR_MODE))
+
+    def test_translations_are_cached_per_mode(self):
+        css_to_xpath('div')
+        css_to_xpath('div')
+        css_to_xpath('div', mode=NODE_MODE)
+        info = XPATH_TRANSLATION_CACHE.info()
+        self.assertEqual((1, 2, 2), (info.hits, info.misses, info.currsize))
+
+    def test_unknown_mode_raises(self):
+        with self.assertRaises(ValueError):
+            css_to_xpath('div', mode='foo')
+
+
+class TestCompileXPath(TestCase):
+
+    def setUp(self):
+        COMPILED_XPATH_CACHE.clear()
+
+    def test_compiled_xpath_is_reused(self):
+        self.assertIs(compile_xpath('//a'), compile_xpath('//a'))
+        self.assertEqual(1, COMPILED_XPATH_CACHE.info().hits)
+
+    def test_namespaces_are_part_of_the_key(self):
+        self.assertIsNot(compile_xpath('//d:href'),
+                         compile_xpath('//d:href', {'d': 'DAV:'}))
+
+    def test_variables_are_passed_when_evaluating(self):
+        document = lxml.html.fromstring(
+            '<div><label for="foo">Foo</label>'
+            '<label for="bar">Bar</label></div>')
+        xpath = compile_xpath('//label[@for=$id]')
+        self.assertEqual(['Bar'],
+                         [node.text for node in xpath(document, id='bar')])
@@ -291,6 +291,117 @@ class TestTables(BrowserTestCase):
             {'normal': foot_row.css('>td').normalized_text(),
              'padded': colspan_padded_text(foot_row)})
 
+    @browsing
+    def test_table_as_lists_with_rowspan(self, browser):
+        browser.open_html(
+            '<table>'
+            ' <thead>'
+            '  <tr><th rowspan="2">Name</th><th colspan="2">Price</th></tr>'
+            '  <tr><th>CHF</th><th>EUR</th></tr>'
+            ' </thead>'
+            ' <tbody>'
+            '  <tr><td rowspan="2">Socks</td><td>12.90</td><td>10.90</td></tr>'
+            '  <tr><td>9.90</td><td>8.40</td></tr>'
+            '  <tr><td>Pants</td><td rowspan="0">35.00</td><td>29.90</td></tr>'
+            '  <tr><td>Shirt</td><td>27.90</td></tr>'
+            ' </tbody>'
+            '</table>')
+
+        self.assertEqual(
+            [['Name', 'Price', 'Price'],
+             ['Name', 'CHF', 'EUR'],
+             ['Socks', '12.90', '10.90'],
+             ['Socks', '9.90', '8.40'],
+             ['Pants', '35.00', '29.90'],
+             ['Shirt', '35.00', '27.90']],
+            browser.css('table').first.lists())
+
+    @browsing
+    def test_grid_is_reused_until_document_changes(self, browser):
+        browser.open(view='test-tables')
+        table = browser.css('#simple-table').first
+        self.assertIs(table.grid, browser.css('#simple-table').first.grid)
+        grid = table.grid
+
+        browser.open(view='test-tables')
+        self.assertIsNot(grid, browser.css('#simple-table').first.grid)
+
+    @browsing
+    def test_iter_lists(self, browser):
+        browser.open(view='test-tables')
+        rows = browser.css('#advanced-table').first.iter_lists(head_offset=1)
+        self.assertEqual(['Name', 'Category', 'CHF'], next(rows))
+        self.assertEqual(['Fancy Pants', 'Pants', '44.80'], next(rows))
+        self.assertEqual(
+            [['Pink Pullover', 'Pullovers', '69.90'],
+             ['TOTAL:', 'TOTAL:', '114.70']],
+            list(rows))
+
+    @browsing
+    def test_iter_dicts(self, browser):
+        browser.open(view='test-tables')
+        table = browser.css('#simple-table').first
+        self.assertEqual(
+            {'Product': 'Pants', 'Price': '35.00'},
+            next(row for row in table.iter_dicts()
+                 if row['Product'] == 'Pants'))
+        self.assertEqual(table.dicts(foot=False),
+                         list(table.iter_dicts(foot=False)))
+
+    @browsing
+    def test_iter_column(self, browser):
+        browser.open(view='test-tables')
+        table = browser.css('#simple-table').first
+        self.assertEqual(['Price', '12.90', '35.00', '47.90'],
+                         list(table.iter_column('Price')))
+        self.assertEqual(['Socks', 'Pants'],
+                         list(table.iter_column(0, head=False, foot=False)))
+        self.assertEqual(
+            [TableCell, TableCell],
+            list(map(type, table.iter_column(1, head=False, foot=False,
+                                             as_text=False))))
+
+        with self.assertRaises(ValueError):
+            table.iter_column('Amount')
+
+    @browsing
+    def test_index_by(self, browser):
+        browser.open(view='test-tables')
+        table = browser.css('#simple-table').first
+        index = table.index_by('Product')
+
+        self.assertEqual(['Socks', 'Pants', 'TOTAL:'], index.keys())
+        self.assertEqual({'Product': 'Pants', 'Price': '35.00'},
+                         index['Pants'].dict())
+        self.assertIn('Socks', index)
+        self.assertIsNone(index.get('Shirt'))
+        with self.assertRaises(KeyError):
+            index['Shirt']
+
+        self.assertEqual(['12.90', '35.00'],
+                         table.index_by(1, foot=False).keys())
+
+    @browsing
+    def test_index_by_detects_duplicates(self, browser):
+        browser.open_html(
+            '<table>'
+            ' <thead><tr><th>Name</th><th>Size</th></tr></thead>'
+            ' <tbody>'
+            '  <tr><td>Socks</td><td>S</td></tr>'
+            '  <tr><td>Socks</td><td>M</td></tr>'
+            '  <tr><td>Pants</td><td>M</td></tr>'
+            ' </tbody>'
+            '</table>')
+        index = browser.css('table').first.index_by('Name')
+
+        self.assertEqual(['Socks'], index.duplicates)
+        self.assertEqual(['S', 'M'], [row.dict()['Size']
+                                      for row in index.rows('Socks')])
+        with self.assertRaises(ValueError) as cm:
+            index['Socks']
+        self.assertEqual('More than one row with "Socks" in column "Name"'
+                         ' found.', str(cm.exception))
+
 
 @all_drivers
 class TestTableRow(BrowserTestCase):
@@ -0,0 +1,96 @@
+from ftw.testbrowser.utils import BufferReader
+from ftw.testbrowser.utils import iter_chunks
+from ftw.testbrowser.utils import LRUCache
+from ftw.testbrowser.utils import SpooledBody
+from six import BytesIO
+from unittest import TestCase
+
+import mmap
+
+
+class TestLRUCache(TestCase):
+
+    def test_value_is_created_once(self):
+        cache = LRUCache()
+        self.assertEqual('FOO', cache.get('foo', str.upper))
+        self.assertEqual('FOO', cache.get('foo', None))
+        self.assertEqual((1, 1, 1024, 1), tuple(cache.info()))
+
+    def test_least_recently_used_entry_is_discarded(self):
+        cache = LRUCache(maxsize=2)
+        cache.get('a', str.upper)
+        cache.get('b', str.upper)
+        cache.get('a', str.upper)
+        cache.get('c', str.upper)
+        self.assertEqual('A', cache.get('a', None))
+        self.assertEqual('B', cache.get('b', str.upper))
+        self.assertEqual(2, len(cache))
+
+    def test_clear_resets_entries_and_statistics(self):
+        cache = LRUCache()
+        cache.get('a', str.upper)
+        cache.get('a', str.upper)
+        cache.clear()
+        self.assertEqual((0, 0, 1024, 0), tuple(cache.info()))
+
+
+class TestBufferReader(TestCase):
+
+    def test_reads_chunks_of_the_buffer(self):
+        reader = BufferReader(memoryview(b'<html>foo</html>'))
+        self.assertEqual(16, len(reader))
+        self.assertEqual(b'<html>', reader.read(6))
+        self.assertEqual(b'foo</html>', reader.read())
+        self.assertEqual(b'', reader.read(10))
+
+    def test_seek_and_tell(self):
+        reader = BufferReader(b'foobar')
+        self.assertEqual(6, reader.seek(0, 2))
+        self.assertEqual(3, reader.seek(-3, 1))
+        self.assertEqual(b'bar', reader.read())
+        reader.seek(0)
+        self.assertEqual(0, reader.tell())
+
+
+class TestIterChunks(TestCase):
+
+    def test_splits_bytes(self):
+        self.assertEqual([b'foo', b'bar', b'b'],
+                         list(iter_chunks(b'foobarb', 3)))
+        self.assertEqual([b'foo', b'bar'],
+                         list(iter_chunks(memoryview(b'foobar'), 3)))
+
+    def test_splits_chunks_of_iterables(self):
+        self.assertEqual([b'foo', b'b', b'ar'],
+                         list(iter_chunks([b'foob', b'', b'ar'], 3)))
+
+    def test_reads_files_from_the_start(self):
+        stream = BytesIO(b'foobar')
+        stream.read()
+        self.assertEqual([b'foob', b'ar'], list(iter_chunks(stream, 4)))
+
+    def test_files_are_closed_at_the_end(self):
+        stream = BytesIO(b'foobar')
+        self.assertEqual([b'foob', b'ar'], list(iter_chunks(stream, 4)))
+        self.assertTrue(stream.closed)
+
+        stream = BytesIO(b'foobar')
+        self.assertEqual([b'foob', b'ar'],
+                         list(iter_chunks(stream, 4, close=False)))
+        self.assertFalse(stream.closed)
+
+
+class TestSpooledBody(TestCase):
+
+    def test_small_bodies_are_kept_in_memory(self):
+        spooled = SpooledBody([b'foo', b'bar'], max_size=6)
+        self.assertFalse(spooled.spilled)
+        self.assertEqual(b'foobar', spooled.body)
+
+    def test_big_bodies_are_memory_mapped(self):
+        spooled = SpooledBody([b'foo', b'bar'], max_size=5)
+        self.assertTrue(spooled.spilled)
+        self.assertIsInstance(spooled.body, mmap.mmap)
+        self.assertEqual(b'foobar', spooled.body[:])
+        spooled.close()
+        self.assertTrue(spooled.body.closed)
@@ -1,8 +1,16 @@
 from base64 import b64encode
+from collections import namedtuple
+from collections import OrderedDict
 from zope.interface.declarations import implementedBy
 
+import mmap
 import re
 import six
+import tempfile
+import threading
+
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
 
 
 def normalize_spaces(text):
@@ -34,3 +42,177 @@ def basic_auth_encode(user, password=None):
     if six.PY3:
         header = header.decode('latin-1')
     return header
+
+
+class LRUCache(object):
+    """A thread safe, bounded cache which discards the least recently used
+    entries when it is full.
+    The cache counts hits and misses, which can be inspected with ``info``.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, factory):
+        """Returns the cached value for ``key``.
+        When the key is not cached yet, the value is created by calling
+        ``factory`` with the key as argument and is stored in the cache.
+
+        :param key: The hashable cache key.
+        :param factory: A callable creating the value for a key.
+        :returns: The cached value.
+        """
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                pass
+            else:
+                self._data[key] = value
+                self.hits += 1
+                return value
+
+        value = factory(key)
+
+        with self._lock:
+            self.misses += 1
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+        return value
+
+    def clear(self):
+        """Removes all entries and resets the statistics.
+        """
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        """Returns the cache statistics.
+
+        :returns: hits, misses, maxsize and currsize of the cache.
+        :rtype: :py:class:`ftw.testbrowser.utils.CacheInfo`
+        """
+        return CacheInfo(self.hits, self.misses, self.maxsize,
+                         len(self._data))
+
+    def __len__(self):
+        return len(self._data)
+
+
+class BufferReader(object):
+    """A read-only file-like object reading from a buffer, such as a
+    ``memoryview``, without copying the whole buffer.
+    Each ``read`` only copies the requested chunk.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = memoryview(buffer)
+        self.position = 0
+
+    def read(self, size=-1):
+        start = self.position
+        if size is None or size < 0:
+            self.position = len(self.buffer)
+        else:
+            self.position = min(start + size, len(self.buffer))
+        return self.buffer[start:self.position].tobytes()
+
+    def seek(self, offset, whence=0):
+        self.position = (offset, self.position + offset,
+                         len(self.buffer) + offset)[whence]
+        return self.position
+
+    def tell(self):
+        return self.position
+
+    def __len__(self):
+        return len(self.buffer)
+
+
+def iter_chunks(data, chunk_size, close=True):
+    """Yields the data in chunks of at most ``chunk_size`` bytes.
+    The data may be a bytes object, a file-like object or an iterable of
+    chunks, such as a WSGI ``app_iter``, which is closed at the end.
+
+    :param data: The data to split into chunks.
+    :type data: bytes, memoryview, file or iterable
+    :param chunk_size: The maximum size of a chunk in bytes.
+    :type chunk_size: int
+    :param close: Whether the file or iterable is closed at the end.
+    :type close: bool (Default: ``True``)
+    """
+    source = data
+    if isinstance(data, (six.text_type, six.binary_type, memoryview)):
+        data = (data,)
+    elif hasattr(data, 'read'):
+        if hasattr(data, 'seek'):
+            data.seek(0)
+        data = _read_chunks(data, chunk_size)
+
+    try:
+        for chunk in data:
+            for start in range(0, len(chunk), chunk_size):
+                piece = chunk[start:start + chunk_size]
+                if isinstance(piece, memoryview):
+                    piece = piece.tobytes()
+                elif isinstance(piece, six.text_type):
+                    piece = piece.encode('utf-8')
+                yield piece
+    finally:
+        if close and hasattr(source, 'close'):
+            source.close()
+
+
+def _read_chunks(stream, chunk_size):
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+class SpooledBody(object):
+    """Collects a response body from chunks in a spooled temporary file.
+    Bodies up to ``max_size`` bytes are kept in memory as bytes, bigger
+    bodies are spilled to disk and memory mapped, so that they do not need
+    to be held in memory.
+
+    :ivar body: The body as bytes or as read-only ``mmap``.
+    """
+
+    def __init__(self, chunks, max_size):
+        self.file = tempfile.SpooledTemporaryFile(max_size=max_size)
+        size = 0
+        for chunk in chunks:
+            self.file.write(chunk)
+            size += len(chunk)
+
+        if size > max_size:
+            self.file.flush()
+            self.body = mmap.mmap(self.file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        else:
+            self.file.seek(0)
+            self.body = self.file.read()
+            self.file.close()
+
+    @property
+    def spilled(self):
+        """``True`` when the body was spilled to disk.
+        """
+        return isinstance(self.body, mmap.mmap)
+
+    def close(self):
+        """Closes the mapping and removes the temporary file.
+        """
+        if self.spilled:
+            self.body.close()
+        self.file.close()
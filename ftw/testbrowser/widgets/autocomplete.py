@@ -61,6 +61,8 @@ class AutocompleteWidget(PloneWidget):
                     'checked': 'checked'})
             etree.SubElement(span, 'label').text = value
 
+        self.browser.invalidate_document_caches()
+
     def query(self, query_string):
         """Make a query request to the autocomplete vocabulary.
 
@@ -3,17 +3,72 @@ from ftw.testbrowser.nodes import NodeWrapper
 
 WIDGETS = []
 
+# Registered widget classes by tag name, which pass the tag pre-filter.
+_WIDGETS_BY_TAG = {}
+
 
 def widget(klass):
     WIDGETS.insert(0, klass)
+    _WIDGETS_BY_TAG.clear()
+    return klass
+
+
+def match_widget(node, browser):
+    """Returns the first registered widget class matching an lxml node or
+    ``None``.
+    Only widgets whose ``match_tags`` and ``match_classes`` pre-filters
+    accept the node are matched. The verdict is cached per node until the
+    document caches of the browser are invalidated.
+
+    :param node: The lxml node.
+    :param browser: The browser instance.
+    :type browser: :py:class:`ftw.testbrowser.core.Browser`
+    :returns: The widget class or ``None``.
+    """
+    cache = getattr(browser, '_widget_matches', None)
+    if cache is not None and node in cache:
+        return cache[node]
+
+    candidates = _candidate_widgets(node)
+    if not candidates:
+        return None
+
+    wrapper = NodeWrapper(node, browser)
+    klass = next((widget_klass for widget_klass in candidates
+                  if widget_klass.match(wrapper)), None)
+    if cache is not None:
+        cache[node] = klass
     return klass
 
 
+def _candidate_widgets(node):
+    tag = node.tag
+    if tag not in _WIDGETS_BY_TAG:
+        _WIDGETS_BY_TAG[tag] = [
+            klass for klass in WIDGETS
+            if getattr(klass, 'match_tags', None) is None
+            or tag in klass.match_tags]
+
+    candidates = _WIDGETS_BY_TAG[tag]
+    if not candidates:
+        return candidates
+
+    classes = set(node.attrib.get('class', '').split())
+    return [klass for klass in candidates
+            if classes.issuperset(getattr(klass, 'match_classes', None) or ())]
+
+
 @widget
 class PloneWidget(NodeWrapper):
     """Represents a Plone widget (div.field).
     """
 
+    #: Pre-filters of the widget: ``match`` is only called for nodes with
+    #: one of these tag names and all of these classes.
+    #: Widgets matching other nodes must change or reset them to ``None``.
+    match_tags = ('div',)
+    match_classes = ('field',)
+
     @staticmethod
     def match(node):
         return node.tag == 'div' and 'field' in node.classes
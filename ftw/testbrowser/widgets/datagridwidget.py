@@ -30,6 +30,7 @@ class DataGridWidget(PloneWidget):
 
             row.node.getparent().remove(row.node)
         self.counter.attrib['value'] = '0'
+        self.browser.invalidate_document_caches()
 
     def append(self, row_values):
         row = wrap_node(deepcopy(self.empty_row.node), self.browser)
@@ -52,6 +53,7 @@ class DataGridWidget(PloneWidget):
         self.table.css('tbody').first.node.insert(-1, row.node)
         self.counter.attrib['value'] = str(
             int(self.counter.attrib['value']) + 1)
+        self.browser.invalidate_document_caches()
 
     @property
     def table(self):
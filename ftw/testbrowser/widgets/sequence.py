@@ -157,12 +157,13 @@ class SequenceWidget(PloneWidget):
         """
 
         if 'id' in input.attrib:
-            labels = self.xpath('//label[@for="%s"]' % input.attrib['id'])
+            labels = self.xpath('//label[@for=$id]', id=input.attrib['id'])
             if labels:
                 return labels.first
 
         if 'name' in input.attrib:
-            labels = self.xpath('//label[@for="%s"]' % input.attrib['name'])
+            labels = self.xpath('//label[@for=$id]',
+                                id=input.attrib['name'])
             if labels:
                 return labels.first
 
@@ -42,6 +42,8 @@ class Z3cChoiceCollection(PloneWidget):
             option_node = options_by_value[value]
             self._to_select.append(option_node.node)
 
+        self.browser.invalidate_document_caches()
+
         # the widget does some magic on form submit:
         # it creates hidden fields for each option..
         input_name = '{0}:list'.format(self.fieldname)
@@ -53,6 +55,8 @@ class Z3cChoiceCollection(PloneWidget):
                 self.node, 'input', type='hidden', name=input_name,
                 value=value)
 
+        self.browser.invalidate_document_caches()
+
     @property
     def fieldname(self):
         if 'data-fieldname' in self.attrib:
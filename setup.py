@@ -59,6 +59,7 @@ setup(name='ftw.testbrowser',
         'Framework :: Plone :: 5.1',
         'Framework :: Plone :: 5.2',
         'Programming Language :: Python',
+        # The asyncbrowser and asyncdriver modules require Python 3.
         "Programming Language :: Python :: 2.7",
         "Programming Language :: Python :: 3.7",
         'Intended Audience :: Developers',